@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+"""
+An asyncio version of the crawler in fetcher3.py. Instead of fetching one page
+at a time through urllib, pages are fetched concurrently over pooled
+keep-alive HTTP/1.1 connections, with a cap on the total number of requests in
+flight and on the number of requests to any one host. As in
+fetcher3.fetch_links_streaming, each page is parsed chunk by chunk as it
+arrives and abandoned once it passes MAX_PAGE_BYTES.
+
+The crawl follows the same BFS as fetcher3.crawl: the first min_crawls pages
+add their links to the queue, the remaining queue is then drained without
+adding new links, and only edges between crawled pages are written to
+network.csv. Pages are fetched out of order, but their links are recorded in
+the order the pages were taken from the queue, so the queue, the page IDs
+and the network are those of the serial crawl.
+
+Run "python HW2/async_crawler.py" to crawl caltech.edu.
+"""
+
+from urllib.parse import urljoin, urlsplit
+from typing import Dict, Tuple, List
+from collections import deque
+import asyncio
+import time
+import ssl
+
+from fetcher3 import (PageReader, write_network, RESTRICTED_DOMAIN, START,
+                      MIN_CRAWLS, MAX_PAGE_BYTES, CHUNK_SIZE)
+from url_store import UrlStore, VisitedSet, EdgeBuffer
+from instrumentation import Report
+
+MAX_CONCURRENCY = 32    # requests in flight across all hosts
+PER_HOST = 8            # requests in flight to a single host
+TIMEOUT = 2             # seconds per page, as in fetch_html_page
+MAX_REDIRECTS = 5
+
+HostKey = Tuple[str, str, int]
+
+
+class HTTPConnectionPool:
+    """
+    Keeps idle keep-alive connections per (scheme, host, port) so that
+    consecutive requests to the same host skip the TCP/TLS handshake.
+    """
+    def __init__(self, max_idle_per_host=PER_HOST):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle: Dict[HostKey, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self.ssl_context = ssl.create_default_context()
+
+    async def acquire(self, key: HostKey, fresh=False):
+        """
+        A connection to key and whether it was reused from the pool. A server
+        may have closed an idle connection without that showing yet, so a
+        reused one can fail on its first request; fresh skips the pool.
+        """
+        idle = self.idle.get(key)
+        while idle and not fresh:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return (reader, writer), True
+            writer.close()
+        scheme, host, port = key
+        conn = await asyncio.open_connection(
+            host, port, ssl=self.ssl_context if scheme == "https" else None)
+        return conn, False
+
+    def release(self, key: HostKey, conn, reusable: bool):
+        idle = self.idle.setdefault(key, [])
+        if reusable and len(idle) < self.max_idle_per_host:
+            idle.append(conn)
+        else:
+            conn[1].close()
+
+    def close(self):
+        for conns in self.idle.values():
+            for _, writer in conns:
+                writer.close()
+        self.idle.clear()
+
+
+# Read a response body delimited by Content-Length, chunked encoding, or the
+# end of the connection, passing it to consume CHUNK_SIZE bytes at a time.
+# consume returns False to stop reading. Returns whether the whole body was
+# read and whether the connection can be reused for another request.
+async def read_body(reader: asyncio.StreamReader, headers: Dict[str, str], consume):
+    async def pieces(size):
+        while size:
+            piece = await reader.readexactly(min(size, CHUNK_SIZE))
+            size -= len(piece)
+            if consume(piece) is False:
+                return False
+        return True
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # skip trailers up to the terminating blank line
+                while (await reader.readline()).strip():
+                    pass
+                break
+            if not await pieces(size):
+                return False, False
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        if not await pieces(int(headers["content-length"])):
+            return False, False
+    else:
+        while True:
+            piece = await reader.read(CHUNK_SIZE)
+            if not piece:
+                return True, False
+            if consume(piece) is False:
+                return False, False
+    return True, headers.get("connection", "").lower() != "close"
+
+
+# Issue one GET request on a pooled connection. If body_reader(status, headers)
+# returns a consume function, the body is passed to it as it is read (see
+# read_body). Returns the status, the headers and whether the whole body was
+# read (None if it was not read at all).
+# If a reused connection turns out to be closed before a status line arrives,
+# the request is sent once more on a new connection.
+async def http_get(pool: HTTPConnectionPool, url: str, body_reader=None):
+    parts = urlsplit(url)
+    scheme = parts.scheme
+    port = parts.port or (443 if scheme == "https" else 80)
+    key = (scheme, parts.hostname, port)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    request = (f"GET {path} HTTP/1.1\r\n"
+               f"Host: {parts.netloc}\r\n"
+               "User-Agent: Mozilla/5.0\r\n"
+               "Accept-Encoding: identity\r\n"
+               "Connection: keep-alive\r\n\r\n").encode("latin-1")
+
+    fresh = False
+    while True:
+        conn, reused = await pool.acquire(key, fresh)
+        reader, writer = conn
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionError("connection closed by server")
+            break
+        except ConnectionError:
+            pool.release(key, conn, False)
+            if not reused:
+                raise
+            fresh = True
+        except BaseException:
+            pool.release(key, conn, False)
+            raise
+
+    reusable = False
+    try:
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        complete = None
+        consume = body_reader(status, headers) if body_reader is not None else None
+        if consume is not None:
+            complete, reusable = await read_body(reader, headers, consume)
+        return status, headers, complete
+    finally:
+        # a connection whose body we skipped is left mid-response, so it is
+        # only returned to the pool once the body has been read
+        pool.release(key, conn, reusable)
+
+
+# The asyncio counterpart of fetch_links_streaming: follow redirects and parse
+# the page as its body arrives. Non-HTML pages are skipped from their headers,
+# and oversized ones from their Content-Length or as soon as they pass
+# max_bytes, so a chunked page is never read past the cap.
+async def _fetch_page_links(pool: HTTPConnectionPool, url: str, max_bytes, report):
+    real_url = url
+    for _ in range(MAX_REDIRECTS + 1):
+        page = None
+
+        # only read the body if it is html (not mp3/avi/...) and not oversized
+        def html_reader(status, headers):
+            nonlocal page
+            length = headers.get("content-length", "0")
+            if (status == 200 and "text/html" in headers.get("content-type", "")
+                    and (not length.isdigit() or int(length) <= max_bytes)):
+                page = PageReader(real_url, max_bytes, report)
+                return page.feed
+            return None
+
+        status, headers, complete = await http_get(pool, real_url, html_reader)
+        if status in (301, 302, 303, 307, 308) and "location" in headers:
+            real_url = urljoin(real_url, headers["location"])
+            continue
+        return page.links() if complete else None
+    return None
+
+
+async def fetch_links_async(pool: HTTPConnectionPool, url: str, timeout=TIMEOUT, report=None,
+                            max_bytes=MAX_PAGE_BYTES):
+    try:
+        return await asyncio.wait_for(_fetch_page_links(pool, url, max_bytes, report), timeout)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        raise
+    except Exception:   # not valid UTF-8, timed out, connection errors
+        return None
+
+
+async def async_crawl(start=START, restricted_domain=RESTRICTED_DOMAIN,
+                      min_crawls=MIN_CRAWLS, output="HW2/network.csv",
+                      max_concurrency=MAX_CONCURRENCY, per_host=PER_HOST,
+                      timeout=TIMEOUT, report_path=None):
+    report = Report("async_crawl")
+    pool = HTTPConnectionPool(per_host)
+    global_limit = asyncio.Semaphore(max_concurrency)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    history = EdgeBuffer()          # edges between page IDs, as in crawl()
+    links: deque = deque()          # BFS queue of page IDs
+    links_to_ints = UrlStore(first_id=1)
+    links_to_ints.add(start)
+    crawled = VisitedSet()          # pages fetched or being fetched
+    crawled.add(1)
+    expansions = 0                  # pages whose links are enqueued
+    completed = 0
+
+    async def fetch(url: str):
+        host = urlsplit(url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+        async with global_limit, host_limit:
+            t0 = time.perf_counter()
+            links = await fetch_links_async(pool, url, timeout, report)
+        report.observe("fetch_seconds", time.perf_counter() - t0)
+        report.count("pages_fetched")
+        if links is None:
+            report.count("pages_failed")
+        return links
+
+    def record_links(curr_id: int, next_links, add_to_queue: bool):
+        """
+        Create edges between the current link and its in-domain neighbors,
+        assigning IDs to pages we have not seen before, and enqueue the
+        neighbors if add_to_queue.
+        """
+        if next_links is None:
+            return
+        for link in next_links:
+            if restricted_domain in link:
+                link_id, _ = links_to_ints.add(link)
+                if add_to_queue:
+                    links.append(link_id)
+                history.append(curr_id, link_id)
+
+    # Dispatch links in queue order, keeping at most max_concurrency pages in
+    # flight, and record their links in the same order: a queued link is then
+    # only dispatched once every page before it in the serial BFS has been
+    # recorded. A page is marked crawled when it is dispatched so that a link
+    # queued twice is never fetched twice.
+    in_flight: deque = deque()      # (task, page ID, add_to_queue), in queue order
+    with report.stage("fetch"):
+        try:
+            record_links(1, await fetch(start), True)
+
+            while links or in_flight:
+                while links and len(in_flight) < max_concurrency:
+                    curr_id = links.popleft()
+                    if curr_id in crawled:
+                        continue
+                    crawled.add(curr_id)
+                    add_to_queue = expansions < min_crawls
+                    expansions += add_to_queue
+                    task = asyncio.ensure_future(fetch(links_to_ints.url(curr_id)))
+                    in_flight.append((task, curr_id, add_to_queue))
+
+                if not in_flight:
+                    break
+                report.gauge("queue_depth", len(links))
+                report.gauge("in_flight", len(in_flight))
+                task, curr_id, add_to_queue = in_flight.popleft()
+                record_links(curr_id, await task, add_to_queue)
+                completed += 1
+                if completed % 50 == 0:
+                    print(f"Crawled: {completed}, queue: {len(links)}")
+        finally:
+            for task, _, _ in in_flight:
+                task.cancel()
+            pool.close()
+
+    # Clean dataset to only include sites we crawled
+    print("Cleaning data")
+    with report.stage("clean"):
+        cleaned_history = history.restrict(crawled)
+    with report.stage("write"):
+        write_network(cleaned_history, output)
+
+    seconds = report.stage_seconds("fetch")
+    report.set("pages_per_second", report.counters.get("pages_fetched", 0) / seconds
+               if seconds else 0.0)
+    report.set("nodes", len(crawled))
+    report.set("edges", len(cleaned_history))
+    if report_path:
+        report.write(report_path)
+        print(report.summary())
+    return cleaned_history
+
+
+def crawl_async(**kwargs):
+    return asyncio.run(async_crawl(**kwargs))
+
+
+if __name__ == "__main__":
+    crawl_async()
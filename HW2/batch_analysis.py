@@ -0,0 +1,311 @@
+"""
+Analyze many edge lists (crawl snapshots, generated graphs) in one run and
+write one results table, with the work of every graph spread over a single
+process pool:
+
+- Each graph is loaded once in the parent (through graph_cache), and its
+  symmetric adjacency is copied into shared memory. Workers map the CSR
+  arrays by name instead of receiving a pickled copy with every task.
+- The expensive stages are split into tasks: the all-pairs BFS behind the
+  diameter and average path length into ranges of sources, and the triangle
+  count into ranges of rows with equal work. Tasks from different graphs
+  share the pool, so a few large graphs and many small ones both keep every
+  core busy. Per-task results are merged in the parent.
+- New graphs are loaded only while fewer than 4 tasks per worker are
+  queued, and each graph's shared memory is released when its last task
+  finishes, so memory holds a few graphs at a time however many are listed.
+  Every task carries the keys of the graphs still being analyzed when it
+  was submitted, and a worker unmaps the older graphs that are not among
+  them before running it, so a released graph's pages are freed by the
+  first tasks submitted after its release.
+
+The metrics are those of graph_analysis.analyze: on a disconnected graph
+the path and clustering metrics are those of its giant component.
+
+Usage: python HW2/batch_analysis.py EDGE_LIST_OR_DIR ... [--out results.csv] [--workers N]
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import os
+import time
+import numpy as np
+import scipy.sparse as sp
+
+from clustering import binary_adjacency, _triangles, _stats
+from components import giant_component
+from graph_analysis import load_edge_list, connected_components, degrees
+from shortest_paths import bfs_from_sources, _batch_size
+
+EXTENSIONS = (".csv", ".txt", ".tsv", ".edges")
+MIN_SOURCES = 64        # fewest BFS sources worth a task of their own
+MIN_WORK = 1 << 20      # least A @ A work worth a triangle task of its own
+TASKS_PER_WORKER = 4    # queued tasks per worker before another graph is loaded
+
+FIELDS = ["graph", "nodes", "edges", "max_out_degree", "max_in_degree", "components",
+          "giant_nodes", "diameter", "avg_path_length", "num_triangles", "num_triplets", "clustering",
+          "avg_clustering", "seconds", "task_seconds", "error"]
+
+
+class SharedArrays:
+    """
+    NumPy arrays copied into named shared memory blocks. spec describes them
+    for attach(), which maps them in another process without a copy.
+    """
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.blocks = []
+        self.spec = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+
+    def release(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+
+def attach(spec) -> Tuple[List[SharedMemory], Dict[str, np.ndarray]]:
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+def _csr(arrays) -> sp.csr_matrix:
+    n = len(arrays["indptr"]) - 1
+    return sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(n, n))
+
+
+_attached = {}      # graph key -> (blocks, adjacency), in this worker
+
+# The adjacency of graph key, mapped on first use. Keys increase, and live
+# holds every key still in use when the task was submitted (key the
+# largest), so a smaller key missing from it was released by the parent and
+# its mapping is closed.
+def _worker_adjacency(key, spec, live) -> sp.csr_matrix:
+    for old in [k for k in _attached if k < key and k not in live]:
+        blocks = _attached.pop(old)[0]
+        for block in blocks:
+            block.close()
+    if key not in _attached:
+        blocks, arrays = attach(spec)
+        _attached[key] = (blocks, _csr(arrays))
+    return _attached[key][1]
+
+
+# One task: stage "paths" runs the BFS from sources first..last-1 and returns
+# the largest eccentricity and the distance sum;
+# stage "triangles" returns the triangles through vertices first..last-1.
+def _run_task(A, stage, first, last):
+    start = time.perf_counter()
+    if stage == "paths":
+        eccentricity, distance_sum = 0, 0
+        batch = _batch_size(A.shape[0])
+        for lo in range(first, last, batch):
+            e, d, _ = bfs_from_sources(A, np.arange(lo, min(lo + batch, last)))
+            eccentricity = max(eccentricity, int(e.max()))
+            distance_sum += int(d.sum())
+        result = (eccentricity, distance_sum)
+    else:
+        result = _triangles(A, first, last)
+    return result, time.perf_counter() - start
+
+def _worker_task(key, spec, live, stage, first, last):
+    return _run_task(_worker_adjacency(key, spec, live), stage, first, last)
+
+
+def edge_lists(paths) -> List[str]:
+    """ The given files, and the edge list files in the given directories. """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, f) for f in os.listdir(path)
+                            if f.endswith(EXTENSIONS) and not f.startswith("."))
+        else:
+            files.append(path)
+    return files
+
+
+class _Job:
+    """ One graph being analyzed: its arrays, tasks and partial results. """
+    def __init__(self, path, stages, workers):
+        self.start = time.perf_counter()
+        self.row = {"graph": path}
+        self.shared: Optional[SharedArrays] = None
+        self.task_seconds = 0.0
+        self.paths = None       # largest eccentricity, distance sum
+        self.triangles = None
+        self.key = None         # of the shared arrays, in the workers
+
+        g = load_edge_list(path)
+        out_degree, in_degree = degrees(g)
+        self.row.update({"nodes": g.num_nodes, "edges": g.num_edges,
+                         "max_out_degree": int(out_degree.max(initial=0)),
+                         "max_in_degree": int(in_degree.max(initial=0))})
+        labels = connected_components(g)
+        if len(labels) and labels.max() > 0:
+            g = g.subgraph(giant_component(labels))
+        self.row.update({"components": int(labels.max()) + 1 if len(labels) else 0,
+                         "giant_nodes": g.num_nodes})
+        A = binary_adjacency(g.adjacency())
+        n = A.shape[0]
+        self.loops = (A.diagonal() > 0).astype(np.int64)
+        self.loop_degrees = np.diff(A.indptr).astype(np.int64)
+        A.setdiag(0)
+        A.eliminate_zeros()
+        self.A = sp.csr_matrix((A.data.astype(np.int32), A.indices, A.indptr), shape=A.shape)
+
+        self.tasks = []
+        if "paths" in stages and n:
+            self.paths = [0, 0]
+            parts = max(1, min(TASKS_PER_WORKER * workers, n // MIN_SOURCES))
+            bounds = np.linspace(0, n, parts + 1).astype(np.int64)
+            self.tasks += [("paths", int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        if "clustering" in stages and n:
+            self.triangles = np.zeros(n, dtype=np.int64)
+            work = np.cumsum(np.asarray(self.A @ np.diff(self.A.indptr)).ravel())
+            parts = max(1, min(TASKS_PER_WORKER * workers, int(work[-1]) // MIN_WORK))
+            bounds = np.unique(np.concatenate([[0], np.searchsorted(
+                work, np.linspace(0, work[-1], parts + 1)[1:-1]), [n]]))
+            self.tasks += [("triangles", int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+        self.remaining = len(self.tasks)
+
+    def merge(self, task, result, seconds):
+        stage, first, last = task
+        self.task_seconds += seconds
+        self.remaining -= 1
+        if stage == "paths":
+            eccentricity, distance_sum = result
+            self.paths = [max(self.paths[0], eccentricity), self.paths[1] + distance_sum]
+        else:
+            self.triangles[first:last] = result
+
+    def finish(self) -> Dict:
+        n = self.A.shape[0]
+        if self.paths is not None:
+            self.row["diameter"] = self.paths[0]
+            self.row["avg_path_length"] = self.paths[1] / (n * (n - 1)) if n > 1 else 0.0
+        if self.triangles is not None:
+            self.row.update(_stats(self.triangles, self.loop_degrees, self.loops))
+        self.row["seconds"] = time.perf_counter() - self.start
+        self.row["task_seconds"] = self.task_seconds
+        self.release()
+        return self.row
+
+    def release(self):
+        if self.shared is not None:
+            self.shared.release()
+            self.shared = None
+
+
+def _start(path, stages, workers) -> Tuple[Optional[_Job], Optional[Dict]]:
+    try:
+        return _Job(path, stages, workers), None
+    except Exception as e:      # one bad file shouldn't stop the batch
+        return None, {"graph": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def analyze_batch(paths, stages=("paths", "clustering"), workers=None) -> List[Dict]:
+    """
+    One row of metrics per edge list in paths (files or directories of
+    them), in the order given. Graphs that fail to load get a row with only
+    an error.
+    """
+    files = edge_lists(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    rows: Dict[str, Dict] = {}
+
+    if workers <= 1:
+        for path in files:
+            job, error = _start(path, stages, 1)
+            if job is not None:
+                for task in job.tasks:
+                    job.merge(task, *_run_task(job.A, *task))
+                rows[path] = job.finish()
+            else:
+                rows[path] = error
+        return [rows[path] for path in files]
+
+    queue: Iterator[str] = iter(files)
+    pending = {}                # future -> (job, task)
+    key = 0
+    with ProcessPoolExecutor(workers) as pool:
+        try:
+            while True:
+                while len(pending) < TASKS_PER_WORKER * workers:
+                    path = next(queue, None)
+                    if path is None:
+                        break
+                    job, error = _start(path, stages, workers)
+                    if job is None:
+                        rows[path] = error
+                        continue
+                    if not job.tasks:
+                        rows[path] = job.finish()
+                        continue
+                    job.shared = SharedArrays({"indptr": job.A.indptr, "indices": job.A.indices,
+                                               "data": job.A.data})
+                    key += 1
+                    job.key = key
+                    live = frozenset(other.key for other, _ in pending.values()) | {key}
+                    for task in job.tasks:
+                        pending[pool.submit(_worker_task, key, job.shared.spec, live,
+                                            *task)] = (job, task)
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, task = pending.pop(future)
+                    job.merge(task, *future.result())
+                    if job.remaining == 0:
+                        rows[job.row["graph"]] = job.finish()
+        finally:
+            for future in pending:
+                future.cancel()
+            for job in {job for job, _ in pending.values()}:
+                job.release()
+    return [rows[path] for path in files]
+
+
+def write_table(rows, path):
+    with open(path, "w", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze many edge lists into one results table.")
+    parser.add_argument("paths", nargs="+", help="edge lists, or directories of them")
+    parser.add_argument("--out", default="batch_results.csv")
+    parser.add_argument("--stages", nargs="+", default=["paths", "clustering"],
+                        choices=["paths", "clustering"])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = analyze_batch(args.paths, args.stages, args.workers)
+    write_table(rows, args.out)
+    task_seconds = sum(row.get("task_seconds", 0.0) for row in rows)
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['graph']}: {row['error']}")
+        else:
+            print(f"{row['graph']}: {row['nodes']} nodes, {row['seconds']:.2f}s")
+    elapsed = time.perf_counter() - start
+    print(f"{len(rows)} graphs in {elapsed:.2f}s ({task_seconds:.2f}s of tasks), "
+          f"results in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark the serial crawler (fetcher3.crawl) against the asyncio crawler
+(async_crawler.crawl_async) on a local stand-in server serving a synthetic
+link graph, and report pages/sec for each and whether they wrote the same
+network. With --recrawl, instead crawl the same server twice through an HTTP
+cache (http_cache.py) and compare the bytes and time of the recrawl with the
+first crawl.
+
+Usage: python HW2/bench_crawl.py [--pages N] [--latency SECONDS] [--recrawl] ...
+"""
+
+from contextlib import redirect_stdout
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import fetcher3
+import async_crawler
+from stand_in_server import make_link_graph, start_server
+
+
+# Run a crawler against a fresh stand-in server and return the number of pages
+# it fetched, the number of edges it wrote and the elapsed time.
+def run_crawler(name, crawl, graph, latency, min_crawls, output, **kwargs):
+    server = start_server(graph, latency)
+    try:
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            crawl(start=server.url, restricted_domain="127.0.0.1",
+                  min_crawls=min_crawls, output=output, **kwargs)
+        elapsed = time.perf_counter() - start
+        hits = server.hits
+    finally:
+        server.shutdown()
+        server.server_close()
+    with open(output) as fp:
+        num_edges = sum(1 for _ in fp) - 1
+    print(f"{name:>8}: {hits} pages in {elapsed:.2f}s "
+          f"({hits / elapsed:.1f} pages/sec), {num_edges} edges")
+    return hits / elapsed
+
+
+# Crawl one stand-in server twice with fetcher3.crawl sharing an HTTP cache,
+# and print the requests, body bytes and time of each crawl.
+def run_recrawl(graph, latency, min_crawls, tmp, max_age=0.0):
+    server = start_server(graph, latency)
+    cache_dir = os.path.join(tmp, "http_cache")
+    try:
+        runs = []
+        for name in ("first", "recrawl"):
+            hits, sent = server.hits, server.bytes_sent
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                fetcher3.crawl(start=server.url, restricted_domain="127.0.0.1",
+                               min_crawls=min_crawls, output=os.path.join(tmp, f"{name}.csv"),
+                               cache_dir=cache_dir, cache_max_age=max_age)
+            runs.append((time.perf_counter() - start, server.bytes_sent - sent))
+            print(f"{name:>8}: {server.hits - hits} requests in {runs[-1][0]:.2f}s, "
+                  f"{runs[-1][1] / 1024:.0f}KB of pages")
+    finally:
+        server.shutdown()
+        server.server_close()
+    with open(os.path.join(tmp, "first.csv")) as a, open(os.path.join(tmp, "recrawl.csv")) as b:
+        same = a.read() == b.read()
+    (first_time, first_bytes), (time_, bytes_) = runs
+    print(f"recrawl: {time_ / first_time:.0%} of the time, "
+          f"{bytes_ / max(first_bytes, 1):.0%} of the bytes, "
+          f"{'same' if same else 'DIFFERENT'} network")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000, help="pages in the synthetic graph")
+    parser.add_argument("--out-degree", type=int, default=10, help="links per page")
+    parser.add_argument("--latency", type=float, default=0.02, help="server delay per request")
+    parser.add_argument("--min-crawls", type=int, default=fetcher3.MIN_CRAWLS)
+    parser.add_argument("--concurrency", type=int, default=async_crawler.MAX_CONCURRENCY)
+    parser.add_argument("--per-host", type=int, default=async_crawler.PER_HOST)
+    parser.add_argument("--recrawl", action="store_true",
+                        help="benchmark a cached recrawl instead of the two crawlers")
+    parser.add_argument("--max-age", type=float, default=0.0,
+                        help="seconds cached pages are used without revalidating")
+    args = parser.parse_args()
+
+    graph = make_link_graph(args.pages, args.out_degree)
+    print(f"Synthetic graph: {args.pages} pages, {args.out_degree} links/page, "
+          f"{args.latency * 1000:.0f}ms latency")
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.recrawl:
+            run_recrawl(graph, args.latency, args.min_crawls, tmp, args.max_age)
+            return
+        serial = run_crawler("serial", fetcher3.crawl, graph, args.latency,
+                             args.min_crawls, os.path.join(tmp, "serial.csv"))
+        concurrent = run_crawler("asyncio", async_crawler.crawl_async, graph,
+                                 args.latency, args.min_crawls,
+                                 os.path.join(tmp, "async.csv"),
+                                 max_concurrency=args.concurrency,
+                                 per_host=args.per_host)
+        with open(os.path.join(tmp, "serial.csv")) as a, open(os.path.join(tmp, "async.csv")) as b:
+            same = a.read() == b.read()
+    print(f" speedup: {concurrent / serial:.1f}x, {'same' if same else 'DIFFERENT'} network")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark link extraction over a corpus of saved HTML pages: the current path
+(read and decode the whole page, feed it to MyHTMLParser, then refine every
+raw href in get_links) against the streaming path (fetcher3.extract_links),
+reporting per-page CPU time and peak memory for each.
+
+Usage: python HW2/bench_extract.py CORPUS_DIR
+       python HW2/bench_extract.py --synthetic 200
+"""
+
+from typing import List
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from fetcher3 import MyHTMLParser, extract_links
+
+
+def current_path(path, base_url):
+    with open(path, "rb") as fp:
+        content = fp.read().decode('utf-8')
+    parser = MyHTMLParser()
+    parser.feed(content)
+    parser.close()
+    return parser.get_links(base_url)
+
+
+def streaming_path(path, base_url):
+    with open(path, "rb") as fp:
+        return extract_links(fp, base_url)
+
+
+# Write synthetic pages of widely varying size, with the repeated, relative,
+# query-string and fragment links real pages have.
+def make_corpus(directory, num_pages, seed=144) -> List[str]:
+    rng = random.Random(seed)
+    paths = []
+    for page in range(num_pages):
+        num_links = int(10 * 2 ** rng.uniform(0, 11))   # 10 to ~20k links
+        hrefs = []
+        for _ in range(num_links):
+            target = rng.randrange(200)
+            kind = rng.random()
+            if kind < 0.4:
+                hrefs.append(f"/news/{target}/")
+            elif kind < 0.6:
+                hrefs.append(f"../people/{target}.html#bio")
+            elif kind < 0.8:
+                hrefs.append(f"https://www.caltech.edu/search?q={target}")
+            else:
+                hrefs.append(f"http://example{target % 7}.com/page{target}")
+        body = "\n".join(f'<p>Paragraph {i} <a href="{h}" class="link">link text {i}</a></p>'
+                         for i, h in enumerate(hrefs))
+        path = os.path.join(directory, f"page{page}.html")
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(f"<html><head><title>Page {page}</title></head><body>\n{body}\n</body></html>\n")
+        paths.append(path)
+    return paths
+
+
+# Run one extraction path over the corpus and return per-page CPU times (ms)
+# and peak traced memory (KB). Memory is traced in a second pass so that
+# tracemalloc's overhead does not count towards the CPU time.
+def measure(extract, paths, base_url):
+    times, peaks, results = [], [], []
+    for path in paths:
+        start = time.process_time()
+        links = extract(path, base_url + os.path.basename(path))
+        times.append(1000 * (time.process_time() - start))
+        results.append(None if links is None else set(links))
+    for path in paths:
+        tracemalloc.start()
+        extract(path, base_url + os.path.basename(path))
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return times, peaks, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", nargs="?", help="directory of saved .html pages")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="benchmark on this many generated pages instead")
+    parser.add_argument("--base-url", default="http://www.caltech.edu/about/",
+                        help="URL the pages are resolved against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            paths = make_corpus(tmp, args.synthetic)
+        elif args.corpus:
+            paths = sorted(os.path.join(args.corpus, f) for f in os.listdir(args.corpus)
+                           if f.endswith((".html", ".htm")))
+        else:
+            parser.error("give a corpus directory or --synthetic N")
+
+        total_kb = sum(os.path.getsize(p) for p in paths) / 1024
+        print(f"{len(paths)} pages, {total_kb:.0f} KB total")
+        runs = {}
+        for name, extract in (("current", current_path), ("streaming", streaming_path)):
+            times, peaks, results = measure(extract, paths, args.base_url)
+            runs[name] = results
+            print(f"{name:>10}: CPU/page mean {statistics.mean(times):.2f}ms, "
+                  f"median {statistics.median(times):.2f}ms, total {sum(times) / 1000:.2f}s | "
+                  f"peak mem mean {statistics.mean(peaks):.0f}KB, max {max(peaks):.0f}KB")
+
+    differ = sum(a != b for a, b in zip(runs["current"], runs["streaming"]))
+    print(f"pages with different link sets: {differ}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark pandemaniac.py against a direct port of the competition's
+dictionary-based simulator on a preferential-attachment graph the size of
+the competition graphs, checking that both give the same scores, then time
+a batch of candidate seed sets played in a process pool.
+
+Usage: python HW2/bench_pandemaniac.py [--nodes 10000] [--seeds 10] [--games 256]
+"""
+
+from collections import Counter
+import argparse
+import time
+import numpy as np
+import scipy.sparse as sp
+
+import pandemaniac
+from generators import preferential_attachment_edges
+
+
+# The competition simulator: every node is updated from the previous round's
+# colors until nothing changes.
+def reference_run(adj_list, game, max_rounds=pandemaniac.MAX_ROUNDS):
+    picked = Counter(v for seeds in game for v in set(seeds))
+    color = {v: None for v in adj_list}
+    for player, seeds in enumerate(game):
+        for v in seeds:
+            if picked[v] == 1:
+                color[v] = player
+    for _ in range(max_rounds):
+        previous = dict(color)
+        for v, neighbors in adj_list.items():
+            votes = Counter()
+            if previous[v] is not None:
+                votes[previous[v]] = pandemaniac.SELF_VOTES
+            for u in neighbors:
+                if previous[u] is not None:
+                    votes[previous[u]] += 1
+            top = votes.most_common(1)
+            if top and top[0][1] > len(neighbors) / 2:
+                color[v] = top[0][0]
+        if color == previous:
+            break
+    counts = Counter(c for c in color.values() if c is not None)
+    return [counts[p] for p in range(len(game))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--links", type=int, default=5, help="links per new node")
+    parser.add_argument("--seeds", type=int, default=10)
+    parser.add_argument("--games", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    u, v = preferential_attachment_edges(args.nodes, args.links, seed=0)
+    A = sp.csr_matrix((np.ones(len(u), dtype=np.int8), (u, v)), shape=(args.nodes, args.nodes))
+    A = pandemaniac.binary_adjacency(A + A.T, drop_loops=True)
+    adj_list = {i: A.indices[A.indptr[i]:A.indptr[i + 1]].tolist() for i in range(args.nodes)}
+    print(f"Graph: {args.nodes} nodes, {A.nnz // 2} edges, {args.seeds} seeds per player")
+
+    rng = np.random.default_rng(0)
+    degree = pandemaniac.degree_seeds(A, args.seeds)
+    pool = pandemaniac.degree_seeds(A, 4 * args.seeds)
+    games = [[rng.choice(pool, args.seeds, replace=False), degree] for _ in range(args.games)]
+
+    start = time.perf_counter()
+    expected = [reference_run(adj_list, [s.tolist() for s in game]) for game in games[:4]]
+    reference = (time.perf_counter() - start) / 4
+    start = time.perf_counter()
+    single = [pandemaniac.simulate(A, game)["scores"].tolist() for game in games[:4]]
+    vectorized = (time.perf_counter() - start) / 4
+    if single != expected:
+        raise SystemExit(f"scores differ: {single} != {expected}")
+    print(f"  reference: {reference * 1000:8.1f}ms per game")
+    print(f"  simulate:  {vectorized * 1000:8.1f}ms per game (same scores)")
+
+    for workers in (1, args.workers):
+        start = time.perf_counter()
+        scores = pandemaniac.evaluate(A, games, workers=workers)
+        elapsed = time.perf_counter() - start
+        label = f"evaluate, {workers or 'all'} worker{'s' if workers != 1 else ''}:"
+        print(f"  {label:<24}{elapsed / len(games) * 1000:6.1f}ms per game "
+              f"({len(games)} games in {elapsed:.2f}s, {reference * len(games) / elapsed:.0f}x)")
+    print(f"  best of {len(games)}: {scores[:, 0].max()} nodes vs {scores[:, 1].min()}")
+
+
+if __name__ == "__main__":
+    main()
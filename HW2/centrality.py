@@ -0,0 +1,225 @@
+"""
+Node centralities on CSR adjacency matrices, replacing the networkx
+functions in HW5 so the crawl graph can be ranked and not just the karate
+club:
+
+    degree_centrality       - degree / (n - 1)
+    closeness_centrality    - from the batched BFS in shortest_paths
+    betweenness_centrality  - Brandes, over batches of sources in a process
+                              pool, optionally from a sample of sources
+    pagerank                - power iteration with a tolerance, an iteration
+                              limit and an optional starting vector
+    top_k                   - the k highest-scoring nodes
+
+Degree, closeness and betweenness treat the graph as undirected, as the HW5
+notebook does; PageRank follows the direction of the edges it is given.
+
+Usage: python HW2/centrality.py EDGE_LIST [--top 5] [--samples 1000]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import argparse
+import os
+import numpy as np
+import scipy.sparse as sp
+
+from clustering import binary_adjacency
+from shortest_paths import _bfs_all, neighbors_of
+
+
+def degree_centrality(adj) -> np.ndarray:
+    A = binary_adjacency(adj, drop_loops=True)
+    n = A.shape[0]
+    return np.diff(A.indptr) / max(n - 1, 1)
+
+
+def closeness_centrality(adj, workers=None) -> np.ndarray:
+    """
+    Closeness of every node, scaled by the fraction of the graph it reaches
+    as networkx does (wf_improved), so disconnected graphs are allowed.
+    """
+    A = binary_adjacency(adj, drop_loops=True)
+    n = A.shape[0]
+    _, distance_sum, reached = _bfs_all(A, np.arange(n), workers)
+    others = (reached - 1).astype(np.float64)
+    closeness = np.divide(others, distance_sum, out=np.zeros(n), where=distance_sum > 0)
+    return closeness * others / max(n - 1, 1)
+
+
+def _dependencies(A, source) -> np.ndarray:
+    """
+    Brandes' dependency of source on every node: the BFS from source counts
+    shortest paths (sigma) level by level, then dependencies are accumulated
+    back from the deepest level. Each level is one vectorized step over the
+    edges leaving it.
+    """
+    n = A.shape[0]
+    distance = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n)
+    distance[source] = 0
+    sigma[source] = 1
+    frontier = np.array([source])
+    levels = []     # (predecessors, successors) of the edges out of each level
+    level = 0
+    while len(frontier):
+        level += 1
+        successors = neighbors_of(A, frontier)
+        predecessors = np.repeat(frontier, np.diff(A.indptr)[frontier])
+        unseen = successors[distance[successors] < 0]
+        distance[unseen] = level
+        on_path = distance[successors] == level
+        predecessors, successors = predecessors[on_path], successors[on_path]
+        targets, inverse = np.unique(successors, return_inverse=True)
+        sigma[targets] += np.bincount(inverse, weights=sigma[predecessors])
+        levels.append((predecessors, successors))
+        frontier = targets
+
+    delta = np.zeros(n)
+    for predecessors, successors in reversed(levels):
+        credit = sigma[predecessors] / sigma[successors] * (1 + delta[successors])
+        nodes, inverse = np.unique(predecessors, return_inverse=True)
+        delta[nodes] += np.bincount(inverse, weights=credit)
+    delta[source] = 0
+    return delta
+
+
+def _betweenness_batch(A, sources) -> np.ndarray:
+    total = np.zeros(A.shape[0])
+    for source in sources:
+        total += _dependencies(A, source)
+    return total
+
+
+_worker_adjacency = None
+
+def _init_worker(A):
+    global _worker_adjacency
+    _worker_adjacency = A
+
+def _worker_batch(sources):
+    return _betweenness_batch(_worker_adjacency, sources)
+
+
+def betweenness_centrality(adj, samples=None, normalized=True, seed=None,
+                           workers=None, batch=64) -> np.ndarray:
+    """
+    Betweenness of every node by Brandes' algorithm, as
+    nx.betweenness_centrality. With samples set, only that many uniformly
+    chosen sources are used and the result is scaled up by n / samples, an
+    unbiased estimate (Brandes and Pich, 2007). Sources are split into
+    batches that run in a process pool when workers > 1.
+    """
+    A = binary_adjacency(adj, drop_loops=True)
+    n = A.shape[0]
+    if samples is None or samples >= n:
+        sources = np.arange(n)
+    else:
+        sources = np.sort(np.random.default_rng(seed).choice(n, size=samples, replace=False))
+    batches = [sources[i:i + batch] for i in range(0, len(sources), batch)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(batches))
+    if workers <= 1:
+        partials = [_betweenness_batch(A, b) for b in batches]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(A,)) as pool:
+            partials = list(pool.map(_worker_batch, batches))
+    betweenness = np.sum(partials, axis=0) if partials else np.zeros(n)
+
+    # every pair is counted from both ends
+    if normalized:
+        scale = 1 / ((n - 1) * (n - 2)) if n > 2 else 1.0
+    else:
+        scale = 0.5
+    return betweenness * scale * n / len(sources) if len(sources) else betweenness
+
+
+def pagerank(adj, alpha=0.85, tol=1e-6, max_iter=100,
+             x0: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    PageRank by power iteration on the sparse transition matrix, as
+    nx.pagerank: entry (i, j) of adj is the weight of the edge i -> j, nodes
+    without out-edges link to every node, and iteration stops once the L1
+    change is below n * tol. x0 (e.g. the ranks of an earlier version of the
+    graph) is the starting vector; it is normalized, and padded with the
+    uniform value if the graph has grown. Raises RuntimeError if max_iter
+    iterations do not converge.
+    """
+    M = sp.csr_matrix(adj, dtype=np.float64)
+    n = M.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_weight = np.asarray(M.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1, out_weight, out=np.zeros(n), where=~dangling)
+    # x @ P with P = D^-1 M, computed as P^T x
+    transition = (sp.diags(inverse) @ M).T.tocsr()
+
+    if x0 is None:
+        x = np.full(n, 1 / n)
+    else:
+        x = np.asarray(x0, dtype=np.float64)[:n]
+        x = np.concatenate([x, np.full(n - len(x), 1 / n)])
+        x /= x.sum()
+
+    for _ in range(max_iter):
+        previous = x
+        x = alpha * (transition @ x + previous[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - previous).sum() < n * tol:
+            return x
+    raise RuntimeError(f"pagerank did not converge in {max_iter} iterations")
+
+
+def top_k(scores, k=5, labels=None) -> List[Tuple[object, float]]:
+    """
+    The k highest scores as (node, score) pairs, highest first, where node is
+    labels[i] if labels are given. Only the top k are sorted, after an O(n)
+    partition.
+    """
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k == 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.lexsort((top, -scores[top]))]
+    names = labels[top] if labels is not None else top
+    return list(zip(names.tolist(), scores[top].tolist()))
+
+
+def main():
+    from graph_analysis import load_edge_list
+
+    parser = argparse.ArgumentParser(description="Rank the nodes of an edge list by centrality.")
+    parser.add_argument("edge_list")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--measures", nargs="+",
+                        default=["degree", "closeness", "betweenness", "pagerank"])
+    parser.add_argument("--samples", type=int, default=None,
+                        help="estimate betweenness from this many sources")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    g = load_edge_list(args.edge_list)
+    A = g.adjacency()
+    for measure in args.measures:
+        if measure == "degree":
+            scores = degree_centrality(A)
+        elif measure == "closeness":
+            scores = closeness_centrality(A, args.workers)
+        elif measure == "betweenness":
+            scores = betweenness_centrality(A, args.samples, seed=args.seed,
+                                            workers=args.workers)
+        elif measure == "pagerank":
+            scores = pagerank(g.directed_adjacency())
+        else:
+            parser.error(f"unknown measure {measure}")
+        print(f"{measure}:")
+        for node, score in top_k(scores, args.top, g.labels):
+            print(f"  {node}: {score:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+One entry point for the HW2 pipeline:
+
+    python HW2/cli.py crawl [--engine serial|async|resumable] [--output network.csv]
+    python HW2/cli.py analyze EDGE_LIST [--no-plots] [--output output_data.txt]
+    python HW2/cli.py batch EDGE_LIST_OR_DIR ... [--out results.csv] [--workers N]
+    python HW2/cli.py visualize EDGE_LIST [--imgs HW2/imgs]
+    python HW2/cli.py generate {er,sbm,pa} --nodes 10000 [--out graph.csv]
+
+Only argparse is imported up front; each subcommand imports the modules it
+needs when it runs, so "analyze --no-plots" never loads matplotlib or
+networkx, and pandas only on a graph cache miss. Plots use the
+non-interactive Agg backend unless MPLBACKEND says otherwise.
+"""
+
+import argparse
+import os
+import sys
+
+
+def crawl(args):
+    kwargs = {"output": args.output, "report_path": args.report}
+    if args.min_crawls is not None:
+        kwargs["min_crawls"] = args.min_crawls
+    if args.start:
+        kwargs["start"] = args.start
+    if args.domain:
+        kwargs["restricted_domain"] = args.domain
+    if args.engine == "serial":
+        from fetcher3 import crawl
+        crawl(cache_dir=args.cache_dir, **kwargs)
+    elif args.engine == "async":
+        from async_crawler import crawl_async
+        crawl_async(max_concurrency=args.concurrency, per_host=args.per_host, **kwargs)
+    else:
+        from resumable_crawler import resumable_crawl
+        resumable_crawl(args.state_dir, cache_dir=args.cache_dir, **kwargs)
+
+
+# Output name prefixes of the edge lists analyze_csv.py and analyze_gr_qc.py
+# already write results for; any other edge list gets "<stem>_".
+PREFIXES = {"network": "", "gr_qc_coauthorships": "gr_qc_"}
+
+
+# Default output paths for an edge list: <prefix>output_data.txt next to it
+# and plots in its directory's imgs/.
+def _output_paths(args):
+    directory, name = os.path.split(args.edge_list)
+    stem = os.path.splitext(name)[0]
+    prefix = PREFIXES.get(stem, f"{stem}_")
+    output = args.output or os.path.join(directory, f"{prefix}output_data.txt")
+    if args.no_plots:
+        return output, None, None
+    imgs = args.imgs or os.path.join(directory, "imgs")
+    os.makedirs(imgs, exist_ok=True)
+    return (output, os.path.join(imgs, f"{prefix}histogram.png"),
+            os.path.join(imgs, f"{prefix}ccdf.png"))
+
+
+def analyze(args):
+    from graph_analysis import analyze
+
+    output, histogram, ccdf = _output_paths(args)
+    analyze(args.edge_list, histogram_path=histogram, ccdf_path=ccdf, output_path=output,
+            hist_bins=range(*args.bins), hist_ylim=args.ylim, workers=args.workers,
+            report_path=args.report)
+    print(f"Wrote {output}")
+
+
+def batch(args):
+    from batch_analysis import analyze_batch, write_table
+
+    rows = analyze_batch(args.paths, args.stages, args.workers)
+    write_table(rows, args.out)
+    print(f"Wrote {len(rows)} rows to {args.out}")
+
+
+def visualize(args):
+    from web_visualizer import visualize
+
+    imgs = args.imgs or os.path.join(os.path.dirname(args.edge_list), "imgs")
+    os.makedirs(imgs, exist_ok=True)
+    visualize(args.edge_list, imgs)
+
+
+def generate(args):
+    from generators import generate_edges, write_edge_list
+
+    try:
+        edges = generate_edges(args.model, args.nodes, args.avg_degree, args.seed)
+    except ValueError as error:     # e.g. --avg-degree too high for --nodes
+        sys.exit(f"generate: {error}")
+    out = args.out or f"{args.model}_{args.nodes}.csv"
+    write_edge_list(edges, out)
+    print(f"Wrote {len(edges)} edges on {args.nodes} nodes to {out}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Crawl, analyze, draw and generate graphs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("crawl", help="crawl a site into an edge list")
+    p.add_argument("--engine", choices=["serial", "async", "resumable"], default="serial")
+    p.add_argument("--start", default=None, help="start URL (default caltech.edu)")
+    p.add_argument("--domain", default=None, help="only follow links containing this")
+    p.add_argument("--min-crawls", type=int, default=None,
+                   help="pages whose links are followed (default fetcher3.MIN_CRAWLS)")
+    p.add_argument("--output", default="HW2/network.csv")
+    p.add_argument("--report", default=None, help="write a JSON run report here")
+    p.add_argument("--cache-dir", default=None, help="HTTP cache for recrawls")
+    p.add_argument("--state-dir", default="HW2/crawl_state", help="resumable crawl state")
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument("--per-host", type=int, default=8)
+    p.set_defaults(run=crawl)
+
+    p = commands.add_parser("analyze", help="degree, path and clustering metrics of an edge list")
+    p.add_argument("edge_list", nargs="?", default="HW2/network.csv")
+    p.add_argument("--output", default=None,
+                   help="metrics file (default: <edge list stem>_output_data.txt beside it, "
+                        "output_data.txt for network.csv)")
+    p.add_argument("--imgs", default=None, help="plot directory (default: imgs/ beside it)")
+    p.add_argument("--no-plots", action="store_true", help="only compute and write the metrics")
+    p.add_argument("--bins", type=int, nargs=3, default=[0, 250, 10],
+                   metavar=("START", "STOP", "STEP"), help="degree histogram bins")
+    p.add_argument("--ylim", type=int, default=1000, help="degree histogram y limit")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--report", default=None, help="write a JSON run report here")
+    p.set_defaults(run=analyze)
+
+    p = commands.add_parser("batch", help="metrics of many edge lists in one results table")
+    p.add_argument("paths", nargs="+", help="edge lists, or directories of them")
+    p.add_argument("--out", default="batch_results.csv")
+    p.add_argument("--stages", nargs="+", default=["paths", "clustering"],
+                   choices=["paths", "clustering"])
+    p.add_argument("--workers", type=int, default=None)
+    p.set_defaults(run=batch)
+
+    p = commands.add_parser("visualize", help="force-directed drawings of a crawl")
+    p.add_argument("edge_list", nargs="?", default="HW2/network.csv")
+    p.add_argument("--imgs", default=None, help="image directory (default: imgs/ beside it)")
+    p.set_defaults(run=visualize)
+
+    p = commands.add_parser("generate", help="write a random graph as an edge list")
+    p.add_argument("model", choices=["er", "sbm", "pa"])
+    p.add_argument("--nodes", type=int, default=10000)
+    p.add_argument("--avg-degree", type=int, default=8)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--out", default=None, help="edge list path (default: <model>_<nodes>.csv)")
+    p.set_defaults(run=generate)
+    return parser
+
+
+def main(argv=None):
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "generate" and args.nodes < 2:
+        parser.error("generate: --nodes must be at least 2")
+    args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
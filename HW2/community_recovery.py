@@ -0,0 +1,138 @@
+"""
+Community recovery on stochastic block models by sparse spectral
+clustering. The graph is kept as a CSR adjacency throughout: the normalized
+Laplacian is a sparse matrix, its k smallest eigenvectors come from ARPACK
+(scipy.sparse.linalg.eigsh) instead of a dense eigendecomposition, and
+k-means runs on the n x k embedding, so memory is O(n k + m) rather than the
+O(n^2) of a dense adjacency.
+
+sweep() runs recovery over a grid of (A, B, n) settings, A and B being the
+within- and between-community edge probabilities as in ssbm.py, in a process
+pool, and reports the accuracy and wall time of each:
+
+    python HW2/community_recovery.py --a 0.1 0.05 --b 0.01 --n 1000 10000 --k 3
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import itertools
+import json
+import time
+import numpy as np
+import scipy.sparse as sp
+from scipy.cluster.vq import kmeans2
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.linalg import eigsh
+
+from generators import sbm_adjacency
+
+
+def normalized_laplacian(A) -> sp.csr_matrix:
+    """ L = I - D^-1/2 A D^-1/2 of a symmetric adjacency, with isolated nodes left at 1. """
+    A = sp.csr_matrix(A, dtype=np.float64)
+    degrees = np.asarray(A.sum(axis=1)).ravel()
+    scale = np.zeros_like(degrees)
+    scale[degrees > 0] = 1 / np.sqrt(degrees[degrees > 0])
+    D = sp.diags(scale)
+    return (sp.identity(A.shape[0], format='csr') - D @ A @ D).tocsr()
+
+
+def spectral_embedding(A, k, seed=None) -> np.ndarray:
+    """
+    Eigenvectors of the k smallest eigenvalues of the normalized Laplacian,
+    one row per node, each row scaled to unit length (Ng, Jordan and Weiss,
+    2001). The eigenvalues of L lie in [0, 2], so they are found as the
+    largest of 2I - L, which ARPACK converges on much faster than the
+    smallest of L.
+    """
+    L = normalized_laplacian(A)
+    n = L.shape[0]
+    rng = np.random.default_rng(seed)
+    shifted = 2 * sp.identity(n, format='csr') - L
+    _, vectors = eigsh(shifted, k=k, which='LA', v0=rng.random(n))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def spectral_clusters(A, k, seed=None) -> np.ndarray:
+    """ Cluster label of every node of the graph with sparse adjacency A. """
+    embedding = spectral_embedding(A, k, seed)
+    _, labels = kmeans2(embedding, k, minit='++', seed=seed)
+    return labels
+
+
+def recovery_accuracy(truth, labels, k) -> float:
+    """
+    Fraction of nodes whose cluster matches their community, under the
+    matching of clusters to communities that maximizes it.
+    """
+    confusion = np.zeros((k, k), dtype=np.int64)
+    np.add.at(confusion, (np.asarray(truth), np.asarray(labels)), 1)
+    rows, cols = linear_sum_assignment(confusion, maximize=True)
+    return float(confusion[rows, cols].sum() / len(truth))
+
+
+def block_sizes(n, k) -> List[int]:
+    """ k community sizes as equal as possible, summing to n. """
+    return [n // k + (i < n % k) for i in range(k)]
+
+
+def recover(a, b, n, k=3, seed=None) -> Dict[str, float]:
+    """
+    Generate an SBM with k equal communities, probability a within and b
+    between them, and recover the communities spectrally.
+    """
+    probs = np.where(np.eye(k, dtype=bool), a, b)
+    start = time.perf_counter()
+    A, truth = sbm_adjacency(block_sizes(n, k), probs, seed)
+    generated = time.perf_counter()
+    labels = spectral_clusters(A, k, seed)
+    done = time.perf_counter()
+    return {"a": a, "b": b, "n": n, "k": k, "seed": seed, "edges": A.nnz // 2,
+            "accuracy": recovery_accuracy(truth, labels, k),
+            "generate_seconds": generated - start, "cluster_seconds": done - generated}
+
+
+def _recover(args: Tuple) -> Dict[str, float]:
+    return recover(*args)
+
+
+def sweep(a_values: Iterable[float], b_values: Iterable[float], n_values: Iterable[int],
+          k=3, trials=1, seed=0, workers: Optional[int] = None) -> List[Dict[str, float]]:
+    """
+    recover() for every combination of a, b and n, trials times each with
+    seeds seed, seed + 1, ..., split across a process pool.
+    """
+    jobs = [(a, b, n, k, seed + t) for a, b, n in itertools.product(a_values, b_values, n_values)
+            for t in range(trials)]
+    if workers == 1:
+        return [_recover(job) for job in jobs]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_recover, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spectral community recovery sweep on SBMs.")
+    parser.add_argument("--a", nargs="+", type=float, default=[0.7])
+    parser.add_argument("--b", nargs="+", type=float, default=[0.1])
+    parser.add_argument("--n", nargs="+", type=int, default=[30])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--trials", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = sweep(args.a, args.b, args.n, args.k, args.trials, args.seed, args.workers)
+    for r in results:
+        print(f"a={r['a']:<6} b={r['b']:<6} n={r['n']:<8} seed={r['seed']:<3} "
+              f"accuracy={r['accuracy']:.3f}  generate {r['generate_seconds']:.2f}s  "
+              f"cluster {r['cluster_seconds']:.2f}s")
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Connected components by an array-backed union-find, so an edge list can be
+split into components in one pass over its edges without building a graph:
+each chunk of edges is merged into a parent array indexed by node ID.
+
+Unions are vectorized over a whole chunk. Every edge whose endpoints have
+different roots hooks the larger root under the smaller one (np.minimum.at,
+so a root with several such edges takes the smallest), and the edges still
+joining different roots go round again. Parents always point to smaller IDs,
+so there are no cycles, and each root ends up the smallest ID of its
+component. After every round the whole parent array is flattened by pointer
+doubling (parent = parent[parent] until nothing changes), so a chain of any
+length built by one round collapses in O(log length) passes, and the next
+round reads every root in one step.
+
+The path metrics (diameter, average path length) are only defined on a
+connected graph, so analyze and batch_analysis use giant_component to
+restrict them, and the clustering metrics, to the largest component;
+component_metrics gives them for every component.
+
+Usage: python HW2/components.py EDGE_LIST [--each] [--min-size 2]
+"""
+
+from typing import Dict, List, Tuple
+import argparse
+import numpy as np
+import scipy.sparse as sp
+
+from clustering import clustering_stats
+from degree_stream import iter_edge_chunks, CHUNK_EDGES
+from shortest_paths import path_metrics
+
+
+class UnionFind:
+    """ Components of the nodes 0..n-1 (growing as larger IDs are seen). """
+    def __init__(self, n=0):
+        self.parent = np.arange(n, dtype=np.int64)
+        self.present = np.zeros(n, dtype=bool)  # IDs that appeared in an edge
+
+    def _grow(self, n):
+        if n > len(self.parent):
+            self.parent = np.concatenate([self.parent, np.arange(len(self.parent), n)])
+            self.present = np.pad(self.present, (0, n - len(self.present)))
+
+    def find(self, x) -> np.ndarray:
+        """ Roots of the nodes x. """
+        self.flatten()
+        return self.parent[np.asarray(x, dtype=np.int64)]
+
+    def union(self, u, v):
+        """ Merge the components of u[i] and v[i] for every i. """
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        if len(u) == 0:
+            return
+        self._grow(int(max(u.max(), v.max())) + 1)
+        self.present[u] = True
+        self.present[v] = True
+        while len(u):
+            u, v = self.find(u), self.find(v)
+            differ = u != v
+            u, v = u[differ], v[differ]
+            np.minimum.at(self.parent, np.maximum(u, v), np.minimum(u, v))
+
+    def flatten(self):
+        """ Point every node straight at its root, by pointer doubling. """
+        while True:
+            up = self.parent[self.parent]
+            if np.array_equal(up, self.parent):
+                return
+            self.parent = up
+
+    def labels(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The IDs that appeared in an edge and their component numbers 0..k-1,
+        numbered by smallest ID.
+        """
+        self.flatten()
+        ids = np.flatnonzero(self.present)
+        _, labels = np.unique(self.parent[ids], return_inverse=True)
+        return ids, labels.ravel()
+
+
+def stream_components(path, chunk_edges=CHUNK_EDGES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Node IDs of an edge list and their component numbers, reading the edges
+    chunk by chunk. IDs must be non-negative integers, as for degree_stream.
+    """
+    uf = UnionFind()
+    for sources, targets in iter_edge_chunks(path, chunk_edges):
+        uf.union(sources, targets)
+    return uf.labels()
+
+
+def edge_components(sources, targets, n) -> np.ndarray:
+    """ Component numbers of nodes 0..n-1 given as edge arrays, isolated nodes included. """
+    uf = UnionFind(n)
+    uf.union(sources, targets)
+    uf.present[:] = True
+    return uf.labels()[1]
+
+
+def component_labels(adj) -> np.ndarray:
+    """ Component number of every node of a square sparse adjacency matrix. """
+    A = sp.coo_matrix(adj)
+    return edge_components(A.row, A.col, A.shape[0])
+
+
+def component_sizes(labels) -> np.ndarray:
+    """ Size of every component, largest first. """
+    return np.sort(np.bincount(labels))[::-1]
+
+
+def size_distribution(labels) -> Dict[int, int]:
+    """ Number of components of each size. """
+    sizes, counts = np.unique(np.bincount(labels), return_counts=True)
+    return dict(zip(sizes.tolist(), counts.tolist()))
+
+
+def giant_component(labels) -> np.ndarray:
+    """ Mask of the nodes in the largest component (the lowest-numbered on ties). """
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return np.zeros(0, dtype=bool)
+    return labels == np.argmax(np.bincount(labels))
+
+
+def component_metrics(adj, labels=None, min_size=2, workers=None) -> List[Dict]:
+    """
+    Size, diameter, average path length and clustering of every component
+    with at least min_size nodes, largest first.
+    """
+    A = sp.csr_matrix(adj)
+    if labels is None:
+        labels = component_labels(A)
+    sizes = np.bincount(labels)
+    rows = []
+    for c in np.argsort(-sizes, kind="stable"):
+        if sizes[c] < min_size:
+            break
+        nodes = np.flatnonzero(labels == c)
+        sub = A[nodes][:, nodes]
+        rows.append({"component": int(c), "nodes": int(sizes[c]),
+                     **path_metrics(sub, workers), **clustering_stats(sub)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connected components of an edge list.")
+    parser.add_argument("edge_list")
+    parser.add_argument("--chunk-edges", type=int, default=CHUNK_EDGES)
+    parser.add_argument("--each", action="store_true",
+                        help="path and clustering metrics of every component")
+    parser.add_argument("--min-size", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    ids, labels = stream_components(args.edge_list, args.chunk_edges)
+    sizes = component_sizes(labels)
+    print(f"{len(ids)} nodes in {len(sizes)} components, giant component "
+          f"{sizes[0] if len(sizes) else 0} nodes")
+    print("component sizes (size: count):",
+          ", ".join(f"{s}: {c}" for s, c in sorted(size_distribution(labels).items(),
+                                                    reverse=True)))
+    if args.each:
+        from graph_analysis import load_edge_list
+
+        g = load_edge_list(args.edge_list)
+        A = g.adjacency()
+        for row in component_metrics(A, component_labels(A), args.min_size, args.workers):
+            print(f"  component {row['component']}: {row['nodes']} nodes, "
+                  f"diameter {row['diameter']}, avg path {row['avg_path_length']:.4f}, "
+                  f"clustering {row['clustering']:.4f}, avg clustering {row['avg_clustering']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Out-of-core degree distributions. The edge list is read in fixed-size chunks
+and in/out degree counts are accumulated with np.bincount, so memory depends
+on the largest node ID rather than on the number of edges, and edge lists
+larger than RAM can be summarized. The result is a pair of degree histograms
+(number of nodes with each degree), from which the CCDFs are computed, and
+which the plotting functions in graph_analysis take directly.
+
+Node IDs must be non-negative integers, as in network.csv and the gr_qc
+list. Every line counts as one edge, so duplicate lines are counted twice
+(graph_analysis.Graph merges them).
+
+Usage: python HW2/degree_stream.py EDGE_LIST [--out degrees.npz]
+           [--histogram histogram.png] [--ccdf ccdf.png]
+"""
+
+from typing import Iterator, Tuple
+import argparse
+import numpy as np
+
+CHUNK_EDGES = 1 << 20
+
+
+# Detect the separator (comma or whitespace) and whether the first line is a
+# header from the first line of an edge list.
+def edge_list_format(path) -> Tuple[str, object]:
+    with open(path) as fp:
+        first = fp.readline()
+    sep = ',' if ',' in first else r'\s+'
+    tokens = first.replace(',', ' ').split()
+    header = 0 if tokens and not tokens[0].lstrip('-').isdigit() else None
+    return sep, header
+
+
+def iter_edge_chunks(path, chunk_edges=CHUNK_EDGES) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """ Yield the (sources, targets) columns of an edge list chunk by chunk. """
+    import pandas as pd
+
+    sep, header = edge_list_format(path)
+    with pd.read_csv(path, sep=sep, header=header, usecols=[0, 1], comment='#',
+                     chunksize=chunk_edges) as reader:
+        for df in reader:
+            yield df.iloc[:, 0].to_numpy(), df.iloc[:, 1].to_numpy()
+
+
+# Add bincount(values) into counts, growing counts if needed.
+def _accumulate(counts, values):
+    if len(values) == 0:
+        return counts
+    if values.min() < 0:
+        raise ValueError("node IDs must be non-negative integers")
+    chunk = np.bincount(values)
+    if len(chunk) > len(counts):
+        counts = np.pad(counts, (0, len(chunk) - len(counts)))
+    counts[:len(chunk)] += chunk
+    return counts
+
+
+class DegreeCounter:
+    """ Accumulates out- and in-degrees, indexed by node ID, one chunk at a time. """
+    def __init__(self):
+        self.out_counts = np.zeros(0, dtype=np.int64)
+        self.in_counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, sources, targets):
+        self.out_counts = _accumulate(self.out_counts, np.asarray(sources, dtype=np.int64))
+        self.in_counts = _accumulate(self.in_counts, np.asarray(targets, dtype=np.int64))
+
+    def degrees(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ Out- and in-degrees of the nodes that appear in some edge. """
+        out_counts, in_counts = self.out_counts, self.in_counts
+        n = max(len(out_counts), len(in_counts))
+        out_counts = np.pad(out_counts, (0, n - len(out_counts)))
+        in_counts = np.pad(in_counts, (0, n - len(in_counts)))
+        present = (out_counts + in_counts) > 0
+        return out_counts[present], in_counts[present]
+
+
+def degree_histogram(degree_values) -> np.ndarray:
+    """ Entry k is the number of nodes with degree k. """
+    return np.bincount(np.asarray(degree_values, dtype=np.int64))
+
+
+def histogram_ccdf(histogram, num_nodes=None) -> np.ndarray:
+    """ Entry k - 1 is the fraction of nodes with degree > k, for k >= 1. """
+    if num_nodes is None:
+        num_nodes = int(histogram.sum())
+    return 1 - np.cumsum(histogram[1:]) / num_nodes
+
+
+def align(*arrays):
+    """ Pad arrays with zeros to a common length. """
+    length = max(len(a) for a in arrays)
+    return [np.pad(a, (0, length - len(a))) for a in arrays]
+
+
+def degree_distribution(path, chunk_edges=CHUNK_EDGES):
+    """
+    Stream an edge list and return its out- and in-degree histograms, padded
+    to the same length, and the number of nodes.
+    """
+    counter = DegreeCounter()
+    for sources, targets in iter_edge_chunks(path, chunk_edges):
+        counter.add(sources, targets)
+    out_degree, in_degree = counter.degrees()
+    out_hist, in_hist = align(degree_histogram(out_degree), degree_histogram(in_degree))
+    return out_hist, in_hist, len(out_degree)
+
+
+def save_distribution(path, out_hist, in_hist, num_nodes):
+    out_ccdf, in_ccdf = align(histogram_ccdf(out_hist, num_nodes),
+                              histogram_ccdf(in_hist, num_nodes))
+    np.savez(path, out_hist=out_hist, in_hist=in_hist, num_nodes=num_nodes,
+             out_ccdf=out_ccdf, in_ccdf=in_ccdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Degree histograms and CCDFs of an edge list.")
+    parser.add_argument("edge_list")
+    parser.add_argument("--out", default=None, help="write the arrays to this .npz file")
+    parser.add_argument("--chunk-edges", type=int, default=CHUNK_EDGES)
+    parser.add_argument("--histogram", default=None, help="plot the degree histograms here")
+    parser.add_argument("--ccdf", default=None, help="plot the degree CCDFs here")
+    parser.add_argument("--bin-width", type=int, default=10)
+    args = parser.parse_args()
+
+    out_hist, in_hist, num_nodes = degree_distribution(args.edge_list, args.chunk_edges)
+    edges = int((np.arange(len(out_hist)) * out_hist).sum())
+    max_out = len(np.trim_zeros(out_hist, 'b')) - 1
+    max_in = len(np.trim_zeros(in_hist, 'b')) - 1
+    print(f"{num_nodes} nodes, {edges} edges, max out-degree {max_out}, max in-degree {max_in}")
+    if args.out:
+        save_distribution(args.out, out_hist, in_hist, num_nodes)
+
+    if args.histogram or args.ccdf:
+        from graph_analysis import plot_degree_histograms, plot_ccdfs
+        if args.histogram:
+            bins = range(0, len(out_hist) + args.bin_width, args.bin_width)
+            ylim = max(out_hist.max(), in_hist.max())
+            plot_degree_histograms(out_hist, in_hist, args.histogram, bins,
+                                   (0, bins[-1]), (0, ylim))
+        if args.ccdf:
+            plot_ccdfs(*align(histogram_ccdf(out_hist, num_nodes),
+                              histogram_ccdf(in_hist, num_nodes)), args.ccdf)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,15 @@
 import networkx as nx
-import random
 import matplotlib.pyplot as plt
 
+from generators import gnp_edges
+
 N = 40
 P = 0.23
+SEED = None
 
 G = nx.Graph()
-for i in range(N): 
-    G.add_node(i)
-
-num_possible_edges = int(N * (N - 1) / 2)
-edge_probs = random.choices([0, 1], weights=[1 - P, P], k=num_possible_edges)
-for i in range(N): 
-    for j in range(i + 1, N): 
-        if edge_probs.pop(): 
-            G.add_edge(i, j)
+G.add_nodes_from(range(N))
+G.add_edges_from(zip(*gnp_edges(N, P, SEED)))
 
 plt.figure(figsize=(12, 6))
 pos_circular = nx.circular_layout(G)
@@ -20,11 +20,33 @@ from html.parser import HTMLParser
 from urllib.parse import urljoin
 from urllib import request
 from urllib.error import URLError
-from typing import Dict, Tuple, List, Set
 import urllib
+import codecs
+import io
 import queue
+import time
 import csv
 
+from url_store import UrlStore, VisitedSet, EdgeBuffer
+from instrumentation import Report
+from http_cache import ResponseCache
+
+RESTRICTED_DOMAIN = "caltech.edu"
+START = "http://www.caltech.edu/"
+MIN_CRAWLS = 75
+MAX_PAGE_BYTES = 2 << 20 # pages larger than this are skipped
+CHUNK_SIZE = 16 << 10    # bytes read and parsed at a time when streaming
+
+# Refine a hyperlink: ignore the parameters in dynamic URLs and convert it to
+# an absolute URL. Returns None if it is not an http(s) link.
+def refine_link(url, current_url):
+    url = url.split('?')[0]   # extract the part before '?' if any
+    url = url.split('#')[0]   # extract the part before '#' if any
+    url = urljoin(current_url, url.strip())   # convert to absolute URL
+    if url.startswith("http://") or url.startswith("https://"):
+        return url
+    return None
+
 # Our version of the HTMLParser, which handles start tags differently than Python's
 # own HTMLParser. We overwrite the handle_starttag method to look for the desired
 # hyperlinks.
@@ -35,27 +57,103 @@ class MyHTMLParser(HTMLParser):
 
     def handle_starttag(self, tag, attrs):
         if tag == 'a' or tag == 'area': # extract href links from "a" and "area" tags
-            href = [v for (k, v) in attrs if k == 'href']
-            self.urls.extend(href)
+            for (k, v) in attrs:
+                if k == 'href':
+                    self.add_url(v)
         if tag == 'frame' or tag == 'iframe': # extra src links from "frame" and "iframe" tags
-            src = [v for (k, v) in attrs if k == 'src']
-            self.urls.extend(src)
+            for (k, v) in attrs:
+                if k == 'src':
+                    self.add_url(v)
+
+    def add_url(self, url):
+        self.urls.append(url)
 
     # Refine the hyperlinks: ignore the parameters in dynamic URLs, convert
     # all hyperlinks to absolute URLs, and remove duplicated URLs.
     def get_links(self, current_url):
         res = set()       # use a set to avoid duplicated URLs
         for url in self.urls:
-            url = url.split('?')[0]   # extract the part before '?' if any
-            url = url.split('#')[0]   # extract the part before '#' if any
-            url = urljoin(current_url, url.strip())   # convert to absolute URL
-            if url.startswith("http://") or url.startswith("https://"):
+            url = refine_link(url, current_url)
+            if url is not None:
                 res.add(url)
         res.discard(current_url)    # self-link is removed
         return list(res)
 
+# A parser for the streaming path: links are refined and deduplicated as they
+# are found rather than collected raw and refined in get_links, so it is fed
+# page chunks as they arrive and only ever holds the distinct links.
+class LinkExtractor(MyHTMLParser):
+    def __init__(self, current_url):
+        super().__init__()
+        self.current_url = current_url
+        self.seen = set()     # raw hrefs already refined
+        self.links = {}       # refined links, in the order they were found
+
+    def add_url(self, url):
+        if url is None or url in self.seen:
+            return
+        self.seen.add(url)
+        url = refine_link(url, self.current_url)
+        if url is not None:
+            self.links[url] = None
+
+    def get_links(self, current_url=None):
+        self.links.pop(current_url or self.current_url, None)   # self-link is removed
+        return list(self.links)
+
+# Parse an HTML page fed to it chunk by chunk: each chunk is decoded with an
+# incremental UTF-8 decoder and fed to a LinkExtractor as it arrives. feed()
+# returns False once the page passes max_bytes, and links() raises
+# UnicodeDecodeError if it is not valid UTF-8. Bytes fed are counted in report
+# if one is given.
+class PageReader:
+    def __init__(self, current_url, max_bytes=MAX_PAGE_BYTES, report=None):
+        self.parser = LinkExtractor(current_url)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.max_bytes = max_bytes
+        self.report = report
+        self.size = 0
+
+    def feed(self, chunk) -> bool:
+        self.size += len(chunk)
+        if self.report is not None:
+            self.report.count("bytes_downloaded", len(chunk))
+        if self.size > self.max_bytes:
+            return False
+        self.parser.feed(self.decoder.decode(chunk))
+        return True
+
+    def links(self):
+        self.parser.feed(self.decoder.decode(b'', final=True))
+        self.parser.close()
+        return self.parser.get_links()
+
+# Read an HTML page from a file-like stream in chunks through a PageReader.
+# Returns the page's links, or None if it is not valid UTF-8 or is larger than
+# max_bytes. Bytes read are counted in report if one is given.
+def extract_links(stream, current_url, max_bytes=MAX_PAGE_BYTES, chunk_size=CHUNK_SIZE,
+                  report=None):
+    page = PageReader(current_url, max_bytes, report)
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if not page.feed(chunk):
+                return None
+        return page.links()
+    except UnicodeDecodeError:
+        return None
+
 # Fetch an HTML file and return the real (redirected) URL and the content.
-def fetch_html_page(url):
+# With a cache (http_cache.ResponseCache), unchanged pages are read from disk.
+def fetch_html_page(url, cache=None):
+    if cache is not None:
+        real_url, body = cache.fetch(url, MAX_PAGE_BYTES)
+        try:
+            return (real_url, body.decode('utf-8') if body is not None else None)
+        except UnicodeDecodeError:
+            return (real_url, None)
     content = None
     real_url = url
     req = urllib.request.Request(
@@ -76,11 +174,11 @@ def fetch_html_page(url):
 
 # Fetch the hyperlinks by first fetching the content then using our HTMLParser to
 # parse them.
-def fetch_links(url):
+def fetch_links(url, cache=None):
     links = None
     try:
         parser = MyHTMLParser()
-        real_url, content = fetch_html_page(url)
+        real_url, content = fetch_html_page(url, cache)
         if content is not None:
             parser.urls = []
             parser.feed(content)
@@ -94,32 +192,94 @@ def fetch_links(url):
     return links
 
 
-def crawl(): 
-    RESTRICTED_DOMAIN = "caltech.edu"
-    START = "http://www.caltech.edu/"
-    start_links = fetch_links(START)
-    history: Set[Tuple[int, int]] = set() # set of tuples that contains all connections 
-    # between sites in the caltech domain. Each tuple contains two ints, 
-    # the first being the integer ID of the start site and the second being
-    # the integer ID of the second
-    links: queue.Queue[Tuple[str, str]] = queue.Queue() # queue of links to crawl
+# Fetch the hyperlinks without holding the whole page in memory: non-HTML and
+# oversized pages are rejected from their headers (or as soon as they pass
+# max_bytes), and the body is parsed chunk by chunk as it is read. With a
+# cache the body is parsed once it has been fetched or revalidated.
+def fetch_links_streaming(url, max_bytes=MAX_PAGE_BYTES, chunk_size=CHUNK_SIZE, report=None,
+                          cache=None):
+    if cache is not None:
+        real_url, body = cache.fetch(url, max_bytes, report)
+        if body is None:
+            return None
+        return extract_links(io.BytesIO(body), real_url, max_bytes, chunk_size)
+    links = None
+    req = urllib.request.Request(
+        url=url,
+        headers={'User-Agent': 'Mozilla/5.0'}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=2) as usock:
+            real_url = usock.url   # real_url will be changed if there is a redirection
+            if "text/html" not in (usock.headers.get('content-type') or ''):
+                return None        # only fetch it if it is html (not mp3/avi/...)
+            length = usock.headers.get('content-length')
+            if length is not None and length.isdigit() and int(length) > max_bytes:
+                return None
+            links = extract_links(usock, real_url, max_bytes, chunk_size, report)
+    # Terminate on CTRL+C sequences.
+    except KeyboardInterrupt:
+        raise
+    except:
+        pass
+    return links
+
+
+# Write the crawled network as a "source,target" edge list.
+def write_network(edges, path="HW2/network.csv"):
+    with open(path, "w", newline="") as fp:
+        cw = csv.writer(fp)
+        cw.writerow(["source", "target"])
+        cw.writerows(edges)
+
+
+# Fetch the links of a page, recording its latency, the queue depth and the
+# bytes read in report.
+def fetch_links_timed(url, report: Report, queue_depth: int, cache=None):
+    report.gauge("queue_depth", queue_depth)
+    start = time.perf_counter()
+    links = fetch_links_streaming(url, report=report, cache=cache)
+    report.observe("fetch_seconds", time.perf_counter() - start)
+    report.count("pages_fetched")
+    if links is None:
+        report.count("pages_failed")
+    return links
+
+
+def crawl(start=START, restricted_domain=RESTRICTED_DOMAIN, min_crawls=MIN_CRAWLS,
+          output="HW2/network.csv", report_path=None, cache_dir=None, cache_max_age=0.0): 
+    """
+    Crawl from start and write the network to output. If report_path is
+    given, a JSON report of stage times, fetch latencies, bytes downloaded,
+    queue depth and pages/sec is written there. If cache_dir is given, pages
+    are kept in an HTTP cache there and a recrawl only downloads the pages
+    that changed (see http_cache.py).
+    """
+    report = Report("crawl")
+    cache = ResponseCache(cache_dir, cache_max_age) if cache_dir else None
+    RESTRICTED_DOMAIN = restricted_domain
+    START = start
+    start_links = fetch_links(START, cache)
+    history = EdgeBuffer() # all connections between sites in the caltech 
+    # domain, as pairs of integer IDs: the ID of the start site and the ID of
+    # the site it links to
+    links: queue.Queue[int] = queue.Queue() # queue of IDs of links to crawl
     # Implementation of BFS to crawl the network: iterate through all links from our
     # start page and enqueue each subsequent site's data
 
-    last_idx = 1 # current integer ID for sites
-    links_to_ints: Dict[str, int] = {START: 1} # mapping of links to their IDs
-    crawled: List[int] = [1] # integers corresponding to IDs that 
-    # should be included in our network
+    links_to_ints = UrlStore(first_id=1) # mapping of links to their IDs
+    links_to_ints.add(START)
+    crawled = VisitedSet() # IDs of sites that should be included in our network
+    crawled.add(1)
 
-    MIN_CRAWLS = 75
+    MIN_CRAWLS = min_crawls
 
     for link in start_links: 
         if RESTRICTED_DOMAIN in link: 
-            links.put((START, link))
-            if link not in links_to_ints: 
-                last_idx += 1
-                links_to_ints[link] = last_idx
-                history.add((1, last_idx))
+            link_ID, is_new = links_to_ints.add(link)
+            links.put(link_ID)
+            if is_new: 
+                history.append(1, link_ID)
 
     def find_next_links(add_to_queue: bool):
         """
@@ -127,61 +287,59 @@ def crawl():
         as nodes to query in the links queue. In all cases, create edges between 
         the current link and its neighbors. 
         """ 
-        nonlocal last_idx
-
-        _, curr = links.get()
         # Ensure that we don't repeat a crawl
         while True:        
-            if links_to_ints[curr] not in crawled: 
+            if links.empty(): 
+                return
+            curr_ID = links.get() # BFS: Get first link in queue
+            if curr_ID not in crawled: 
                 break
-            else: 
-                if links.empty(): 
-                    return
-                _, curr = links.get() # BFS: Get first pair in queue
-
-        next_links = fetch_links(curr)
-        curr_ID = links_to_ints[curr] # get ID of current link
-        crawled.append(curr_ID) # note that we visited the current site
+
+        curr = links_to_ints.url(curr_ID)
+        next_links = fetch_links_timed(curr, report, links.qsize(), cache)
+        crawled.add(curr_ID) # note that we visited the current site
         if next_links is None: 
             return 
 
         for link in next_links: 
             if RESTRICTED_DOMAIN in link: # check if in caltech domain
+                # look up the ID of the link, assigning a new one if we 
+                # haven't seen this site before, and log the connection
+                link_ID, _ = links_to_ints.add(link)
                 if add_to_queue: 
-                    links.put((curr, link)) # add new and next link to queue
-                    # if we have already identified this node
-                if link in links_to_ints: 
-                    # add new connection to network
-                    history.add((curr_ID, links_to_ints[link]))
-                else:
-                    # we haven't seen this site before, add it to our dict and 
-                    # log the connection
-                    last_idx += 1
-                    links_to_ints[link] = last_idx
-                    history.add((curr_ID, links_to_ints[link]))
-
-    for i in range(MIN_CRAWLS):
-        if i % 5 == 0: 
-            print(f"Iteration: {i}")
-        find_next_links(True)
-
-    while not links.empty():
-        if links.qsize() % 10 == 0: 
-            print(f"Clearing queue: {links.qsize()} remaining")
-        find_next_links(False)
+                    links.put(link_ID) # add next link to queue
+                history.append(curr_ID, link_ID)
+
+    with report.stage("expand"):
+        for i in range(MIN_CRAWLS):
+            if i % 5 == 0: 
+                print(f"Iteration: {i}")
+            find_next_links(True)
+
+    with report.stage("drain"):
+        while not links.empty():
+            if links.qsize() % 10 == 0: 
+                print(f"Clearing queue: {links.qsize()} remaining")
+            find_next_links(False)
 
     # Clean dataset to only include sites we crawled
     print("Cleaning data")
-    cleaned_history = set()
-    for start, end in history: 
-        if start in crawled and end in crawled: 
-            cleaned_history.add((start, end))
+    with report.stage("clean"):
+        cleaned_history = history.restrict(crawled)
+
+    print(f"{len(crawled)} sites, {len(cleaned_history)} connections")
 
-    print(cleaned_history)
+    with report.stage("write"):
+        write_network(cleaned_history, output)
 
-    cw = csv.writer(open("HW2/network.csv", "w"))
-    cw.writerow(["source", "target"])
-    cw.writerows(list(cleaned_history))
+    fetching = report.stage_seconds("expand", "drain")
+    report.set("pages_per_second", report.counters.get("pages_fetched", 0) / fetching
+               if fetching else 0.0)
+    report.set("nodes", len(crawled))
+    report.set("edges", len(cleaned_history))
+    if report_path:
+        report.write(report_path)
+        print(report.summary())
 
 
 if __name__ == "__main__":
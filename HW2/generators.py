@@ -0,0 +1,218 @@
+"""
+Random graph generators that produce NumPy edge arrays directly, in time
+proportional to the number of edges generated rather than the number of
+possible node pairs, so graphs with millions of nodes can be built for
+experiments. Every generator takes a seed (anything np.random.default_rng
+accepts) and gives the same graph for the same seed.
+
+    gnp_edges       - Erdős–Rényi G(n, p)
+    sbm_edges       - stochastic block model with any k x k probability matrix
+    sbm_adjacency   - the same as a sparse adjacency matrix
+    preferential_attachment_edges - linear preferential attachment
+    configuration_model_edges     - random graph with a given degree sequence
+    generate_edges  - a graph of one of the MODELS with a given average degree
+"""
+
+from typing import Tuple
+import numpy as np
+import scipy.sparse as sp
+
+BATCH = 1 << 22     # geometric gaps drawn per batch
+
+
+def _index_dtype(n):
+    return np.int32 if n < 2 ** 31 else np.int64
+
+
+def _triangle_pairs(k) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The pairs (j, i), j < i, at positions k in the row-by-row enumeration
+    (0, 1), (0, 2), (1, 2), (0, 3), ... of the strict lower triangle.
+    """
+    k = np.asarray(k, dtype=np.int64)
+    i = ((1 + np.sqrt(1 + 8 * k.astype(np.float64))) / 2).astype(np.int64)
+    # the float estimate can be off by one for large k; fix it exactly
+    i -= i * (i - 1) // 2 > k
+    i += (i + 1) * i // 2 <= k
+    return k - i * (i - 1) // 2, i
+
+
+def gnp_edges(n, p, seed=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Edges (u, v), u < v, of an undirected G(n, p) graph, sorted by v then u.
+    Instead of flipping a coin for each of the n(n-1)/2 pairs, the gaps
+    between consecutive edges in the pair enumeration are drawn from a
+    geometric distribution, so the cost is O(n + m) for m edges (Batagelj
+    and Brandes, 2005).
+    """
+    if not 0 <= p <= 1:
+        raise ValueError("p must be between 0 and 1")
+    pairs = n * (n - 1) // 2
+    dtype = _index_dtype(n)
+    if p == 0 or pairs == 0:
+        return np.zeros(0, dtype=dtype), np.zeros(0, dtype=dtype)
+
+    rng = np.random.default_rng(seed)
+    chunks = []
+    last = -1
+    while last < pairs:
+        # enough gaps to cover the remaining pairs in expectation, plus slack
+        expected = (pairs - last) * p
+        size = int(min(BATCH, expected + 4 * np.sqrt(expected) + 16))
+        positions = last + np.cumsum(rng.geometric(p, size=size))
+        last = int(positions[-1])
+        chunks.append(positions[positions < pairs])
+    u, v = _triangle_pairs(np.concatenate(chunks))
+    return u.astype(dtype), v.astype(dtype)
+
+
+def _block_edges(rng, rows, cols, p, same) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Edges of one block of an SBM: each of the pairs between a group of rows
+    nodes and a group of cols nodes (or, if same, among one group of rows
+    nodes) is an edge with probability p. The edge count is drawn from the
+    binomial distribution and then that many distinct pairs are sampled.
+    """
+    pairs = rows * (rows - 1) // 2 if same else rows * cols
+    m = rng.binomial(pairs, p) if pairs else 0
+    if m == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    positions = rng.choice(pairs, size=m, replace=False)
+    if same:
+        return _triangle_pairs(positions)
+    return positions // cols, positions % cols
+
+
+def sbm_edges(sizes, probs, seed=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Edges (u, v), u < v, of an undirected stochastic block model. Nodes are
+    numbered block by block: the first sizes[0] nodes form block 0 and so
+    on. A pair of nodes in blocks a and b is an edge with probability
+    probs[a][b], which must be symmetric. Returns the edge arrays and the
+    block of every node.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    probs = np.asarray(probs, dtype=np.float64)
+    k = len(sizes)
+    if probs.shape != (k, k):
+        raise ValueError("probs must be a k x k matrix for k blocks")
+    if not np.allclose(probs, probs.T):
+        raise ValueError("probs must be symmetric")
+    if (probs < 0).any() or (probs > 1).any():
+        raise ValueError("probabilities must be between 0 and 1")
+
+    rng = np.random.default_rng(seed)
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    us, vs = [], []
+    for a in range(k):
+        for b in range(a, k):
+            u, v = _block_edges(rng, int(sizes[a]), int(sizes[b]), probs[a, b], a == b)
+            us.append(u + starts[a])
+            vs.append(v + starts[b])
+
+    n = int(starts[-1])
+    dtype = _index_dtype(n)
+    blocks = np.repeat(np.arange(k), sizes)
+    return np.concatenate(us).astype(dtype), np.concatenate(vs).astype(dtype), blocks
+
+
+def sbm_adjacency(sizes, probs, seed=None) -> Tuple[sp.csr_matrix, np.ndarray]:
+    """ The symmetric CSR adjacency of sbm_edges(sizes, probs, seed), and the node blocks. """
+    u, v, blocks = sbm_edges(sizes, probs, seed)
+    n = len(blocks)
+    data = np.ones(2 * len(u), dtype=np.int8)
+    A = sp.csr_matrix((data, (np.concatenate([u, v]), np.concatenate([v, u]))), shape=(n, n))
+    return A, blocks
+
+
+def preferential_attachment_edges(n, m=1, seed=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Edges (source, target) of a preferential attachment graph on n nodes.
+    Node 1 links m times to node 0, then each node v = 2, 3, ... links to m
+    earlier nodes, each chosen with probability proportional to its degree
+    before v arrived (with replacement, so for m > 1 a node can link to the
+    same target twice). With m = 1 the graph is a tree.
+
+    The endpoints of every edge so far form a stub array, in which each node
+    appears once per unit of degree, so a uniform stub is a degree-weighted
+    node (Batagelj and Brandes, 2005). Stub 2e is the source of edge e, which
+    is known up front, and stub 2e + 1 is its target, so the stubs drawn
+    for all edges are chosen at once and the targets they point at are
+    resolved by pointer jumping, without a Python loop over the n nodes.
+    """
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    dtype = _index_dtype(n)
+    rng = np.random.default_rng(seed)
+    sources = np.repeat(np.arange(1, n, dtype=np.int64), m)
+    # stubs available to the edges of node v are those of the edges of nodes 1..v-1
+    stubs = 2 * (sources - 1) * m
+    stub = (rng.random(len(sources)) * stubs).astype(np.int64)
+    edge = stub // 2
+
+    targets = np.zeros(len(sources), dtype=np.int64)
+    resolved = (stub % 2 == 0) | (stubs == 0)
+    targets[resolved] = np.where(stubs[resolved] == 0, 0, sources[edge[resolved]])
+    # the rest copy the target of an earlier edge
+    pending = np.flatnonzero(~resolved)
+    pointer = edge
+    while len(pending):
+        points_to = pointer[pending]
+        done = resolved[points_to]
+        targets[pending[done]] = targets[points_to[done]]
+        resolved[pending[done]] = True
+        pending = pending[~done]
+        pointer[pending] = pointer[pointer[pending]]
+    return sources.astype(dtype), targets.astype(dtype)
+
+
+def configuration_model_edges(degrees, seed=None, simple=False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Edges of a random multigraph in which node i has degree degrees[i]: one
+    stub per unit of degree, shuffled and paired up. The degree sum must be
+    even. Self-loops and repeated edges are kept unless simple is set, in
+    which case they are removed (so some degrees end up lower).
+    """
+    degrees = np.asarray(degrees, dtype=np.int64)
+    if (degrees < 0).any():
+        raise ValueError("degrees must be non-negative")
+    if degrees.sum() % 2:
+        raise ValueError("the sum of the degrees must be even")
+    dtype = _index_dtype(len(degrees))
+    rng = np.random.default_rng(seed)
+    stubs = rng.permutation(np.repeat(np.arange(len(degrees), dtype=dtype), degrees))
+    u, v = stubs[0::2], stubs[1::2]
+    if simple:
+        u, v = np.minimum(u, v), np.maximum(u, v)
+        keep = u != v
+        pairs = np.unique(np.column_stack([u[keep], v[keep]]), axis=0)
+        u, v = pairs[:, 0], pairs[:, 1]
+    return u, v
+
+
+MODELS = ("er", "sbm", "pa")
+
+
+def generate_edges(model, n, avg_degree=8, seed=None, blocks=4) -> np.ndarray:
+    """
+    Edges of an n-node graph with about avg_degree links per node, as an
+    (m, 2) array: Erdős–Rényi ("er"), a stochastic block model with blocks
+    equal blocks and 80% of each node's links inside its block ("sbm"), or
+    preferential attachment with avg_degree / 2 links per new node ("pa").
+    """
+    if model == "er":
+        return np.column_stack(gnp_edges(n, avg_degree / (n - 1), seed))
+    if model == "sbm":
+        sizes = [n // blocks] * (blocks - 1) + [n - (blocks - 1) * (n // blocks)]
+        p_in = 0.8 * avg_degree / (n / blocks)
+        p_out = 0.2 * avg_degree / (n - n / blocks)
+        probs = np.where(np.eye(blocks, dtype=bool), p_in, p_out)
+        return np.column_stack(sbm_edges(sizes, probs, seed)[:2])
+    if model == "pa":
+        return np.column_stack(preferential_attachment_edges(n, max(avg_degree // 2, 1), seed))
+    raise ValueError(f"unknown model {model}")
+
+
+def write_edge_list(edges, path):
+    """ Write an (m, 2) edge array as a "source,target" CSV, as network.csv. """
+    np.savetxt(path, edges, fmt="%d", delimiter=",", header="source,target", comments="")
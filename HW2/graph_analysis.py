@@ -0,0 +1,332 @@
+"""
+Shared graph analysis for the HW2 datasets (the crawled network.csv and the
+gr_qc coauthorship list). Edge lists are loaded straight into NumPy CSR
+arrays instead of networkx graphs, and the metrics the analyze scripts report
+are plain functions of a Graph:
+
+    degrees          - out- and in-degree of every node
+    degree_ccdf      - P(degree > k) for k = 1, 2, ...
+    clustering       - triangles, triplets, global and average clustering
+    path_lengths     - diameter and average shortest path length
+
+analyze() runs all of them on one edge list and writes the histogram, CCDF
+and output_data.txt files. On a disconnected graph the path and clustering
+metrics are those of the giant component (see components.py). pandas and
+matplotlib are only imported when an edge list has to be parsed (a graph
+cache miss) or a plot drawn.
+"""
+
+from typing import Dict, Optional, Tuple
+import numpy as np
+import scipy.sparse as sp
+
+import graph_cache
+from instrumentation import Report
+from clustering import clustering_stats
+from components import edge_components, giant_component, size_distribution
+from degree_stream import edge_list_format, degree_histogram, histogram_ccdf, align
+from shortest_paths import path_metrics
+
+OUT = 1     # flags bit: the row node links to the column node
+IN = 2      # flags bit: the column node links to the row node
+CACHE_VERSION = 1   # of the arrays _cached_arrays stores; bump when they change
+
+
+class Graph:
+    """
+    A directed graph stored once as a symmetric CSR adjacency. Row v of
+    (indptr, indices) lists every node joined to v by an edge in either
+    direction, and flags records which directions are present, so the
+    undirected graph and the directed out/in-edge views all share the same
+    index arrays. Nodes are numbered 0..n-1; labels maps them back to the IDs
+    used in the edge list.
+    """
+    def __init__(self, indptr, indices, flags, labels):
+        self.indptr = indptr
+        self.indices = indices
+        self.flags = flags
+        self.labels = labels
+
+    @classmethod
+    def from_edges(cls, sources, targets) -> 'Graph':
+        """
+        Build a Graph from parallel arrays of source and target labels.
+        Duplicate edges are merged, as in nx.DiGraph.
+        """
+        return cls.from_ids(*compact_ids(sources, targets))
+
+    @classmethod
+    def from_ids(cls, s, t, labels) -> 'Graph':
+        """ Build a Graph from edges between node IDs 0..len(labels)-1. """
+        n, m = len(labels), len(s)
+        s, t = np.asarray(s, dtype=np.int64), np.asarray(t, dtype=np.int64)
+
+        # each edge s -> t is an OUT entry in row s and an IN entry in row t;
+        # entries for the same (row, column) are merged by or-ing their flags
+        rows = np.concatenate([s, t])
+        cols = np.concatenate([t, s])
+        flags = np.concatenate([np.full(m, OUT, np.uint8), np.full(m, IN, np.uint8)])
+        keys = rows * n + cols
+        order = np.argsort(keys, kind='stable')
+        keys, flags = keys[order], flags[order]
+        first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else \
+            np.zeros(0, dtype=np.int64)
+        flags = np.bitwise_or.reduceat(flags, first) if len(keys) else flags
+        keys = keys[first]
+
+        index_dtype = np.int32 if n < 2 ** 31 else np.int64
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+        return cls(indptr, (keys % n).astype(index_dtype), flags, labels)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        """ Number of directed edges. """
+        return int(np.count_nonzero(self.flags & OUT))
+
+    def rows(self) -> np.ndarray:
+        """ The row (source node) of every entry of indices. """
+        return np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+
+    def adjacency(self) -> sp.csr_matrix:
+        """ Binary adjacency of the undirected graph, sharing indptr and indices. """
+        data = np.ones(len(self.indices), dtype=np.int8)
+        n = self.num_nodes
+        return sp.csr_matrix((data, self.indices, self.indptr), shape=(n, n), copy=False)
+
+    def directed_adjacency(self) -> sp.csr_matrix:
+        """
+        Adjacency of the directed graph, sharing indptr and indices with the
+        undirected one. Entries for in-edges only are stored as explicit
+        zeros.
+        """
+        data = (self.flags & OUT).astype(np.int8)
+        n = self.num_nodes
+        return sp.csr_matrix((data, self.indices, self.indptr), shape=(n, n), copy=False)
+
+    def to_networkx(self):
+        """ The graph as an nx.DiGraph with the original node labels. """
+        import networkx as nx
+        G = nx.DiGraph()
+        G.add_nodes_from(self.labels.tolist())
+        out = (self.flags & OUT) != 0
+        G.add_edges_from(zip(self.labels[self.rows()[out]].tolist(),
+                             self.labels[self.indices[out]].tolist()))
+        return G
+
+    def subgraph(self, keep) -> 'Graph':
+        """ The subgraph induced by the nodes where the boolean mask keep is set. """
+        keep = np.asarray(keep, dtype=bool)
+        rows = self.rows()
+        kept = keep[rows] & keep[self.indices]
+        new_ids = np.cumsum(keep) - 1
+        n = int(keep.sum())
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(new_ids[rows[kept]], minlength=n), out=indptr[1:])
+        return Graph(indptr, new_ids[self.indices[kept]].astype(self.indices.dtype),
+                     self.flags[kept], self.labels[keep])
+
+
+def compact_ids(sources, targets):
+    """
+    Renumber edge endpoints as dense IDs 0..n-1. Returns the source IDs,
+    target IDs and the labels of the IDs, in sorted order.
+    """
+    sources, targets = np.asarray(sources), np.asarray(targets)
+    labels, ids = np.unique(np.concatenate([sources, targets]), return_inverse=True)
+    ids = ids.astype(np.int32 if len(labels) < 2 ** 31 else np.int64)
+    return ids[:len(sources)], ids[len(sources):], labels
+
+
+# Read the two columns of an edge list.
+def read_edges(path) -> Tuple[np.ndarray, np.ndarray]:
+    import pandas as pd
+
+    sep, header = edge_list_format(path)
+    df = pd.read_csv(path, sep=sep, header=header, usecols=[0, 1], comment='#')
+    return df.iloc[:, 0].to_numpy(), df.iloc[:, 1].to_numpy()
+
+
+# The parsed, compacted edges and CSR arrays of an edge list, memory-mapped
+# from graph_cache and only rebuilt when the file changes.
+def _cached_arrays(path) -> Dict[str, np.ndarray]:
+    def build():
+        s, t, labels = compact_ids(*read_edges(path))
+        g = Graph.from_ids(s, t, labels)
+        return {"sources": s, "targets": t, "labels": labels,
+                "indptr": g.indptr, "indices": g.indices, "flags": g.flags}
+    return graph_cache.cached(path, build, version=CACHE_VERSION)
+
+
+def load_edge_list(path, cache=True) -> Graph:
+    """ Load an edge list as a Graph, through the cache unless cache is False. """
+    if not cache:
+        return Graph.from_edges(*read_edges(path))
+    arrays = _cached_arrays(path)
+    return Graph(arrays["indptr"], arrays["indices"], arrays["flags"], arrays["labels"])
+
+
+def load_edges(path, cache=True):
+    """
+    The edges of an edge list as compacted (sources, targets, labels) arrays,
+    as returned by compact_ids, through the cache unless cache is False.
+    """
+    if not cache:
+        return compact_ids(*read_edges(path))
+    arrays = _cached_arrays(path)
+    return arrays["sources"], arrays["targets"], arrays["labels"]
+
+
+def degrees(g: Graph) -> Tuple[np.ndarray, np.ndarray]:
+    """ Out-degree and in-degree of every node. """
+    rows = g.rows()
+    n = g.num_nodes
+    out_degree = np.bincount(rows[(g.flags & OUT) != 0], minlength=n)
+    in_degree = np.bincount(rows[(g.flags & IN) != 0], minlength=n)
+    return out_degree, in_degree
+
+
+def degree_ccdf(degree_values, num_nodes=None) -> np.ndarray:
+    """ Entry k - 1 is the fraction of nodes with degree > k, for k >= 1. """
+    if num_nodes is None:
+        num_nodes = len(degree_values)
+    return histogram_ccdf(degree_histogram(degree_values), num_nodes)
+
+
+def clustering(g: Graph) -> Dict[str, float]:
+    return clustering_stats(g.adjacency())
+
+
+def path_lengths(g: Graph, workers=None) -> Dict[str, float]:
+    return path_metrics(g.adjacency(), workers)
+
+
+def connected_components(g: Graph) -> np.ndarray:
+    """ Component number of every node, from the graph's out-edges. """
+    out = (g.flags & OUT) != 0
+    return edge_components(g.rows()[out], g.indices[out], g.num_nodes)
+
+
+# Plot degree histograms given as counts per degree (see
+# degree_stream.degree_histogram), rebinned into bins.
+def plot_degree_histograms(out_hist, in_hist, path, bins, xlim, ylim):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+
+    for i, (name, hist, color) in enumerate((("Outdegree", out_hist, 'blue'),
+                                             ("Indegree", in_hist, 'green'))):
+        plt.subplot(1, 2, i + 1)
+        plt.hist(np.arange(len(hist)), bins=bins, weights=hist, color=color, edgecolor='black')
+        plt.title(name)
+        plt.xlabel(name)
+        plt.ylabel('Frequency')
+        plt.xlim(*xlim)
+        plt.ylim(*ylim)
+
+    plt.tight_layout()
+    plt.savefig(path)
+
+
+def plot_ccdfs(out_degree_ccdf, in_degree_ccdf, path):
+    import matplotlib.pyplot as plt
+
+    plt.clf()
+    plt.loglog(np.arange(1, len(out_degree_ccdf) + 1), out_degree_ccdf, label='Out-degree CCDF')
+    plt.loglog(np.arange(1, len(in_degree_ccdf) + 1), in_degree_ccdf, label='In-degree CCDF')
+    plt.xlabel('Degree')
+    plt.ylabel('Complementary Cumulative Distribution Function (CCDF)')
+    plt.legend()
+    plt.savefig(path)
+
+
+def write_results(results, path):
+    with open(path, "w") as fp:
+        fp.write(f"Max diameter: {results['diameter']}\n")
+        fp.write(f"Avg diameter: {results['avg_path_length']}\n")
+        fp.write(f"Clustering Coefficient: {results['clustering']}\n")
+        fp.write(f"Avg Clustering Coefficient: {results['avg_clustering']}\n")
+        fp.write(f"Num Triangles: {results['num_triangles']}\n")
+        if results["components"] > 1:
+            fp.write(f"Num Components: {results['components']}\n")
+            fp.write(f"Giant Component Nodes: {results['giant_nodes']}\n")
+
+
+def analyze(edge_list, histogram_path: Optional[str], ccdf_path: Optional[str],
+            output_path: Optional[str], hist_bins=range(0, 250, 10), hist_ylim=1000,
+            workers=None, report_path=None):
+    """
+    Run the HW2 analysis on an edge list: degree histograms, diameter and
+    average path length, clustering coefficients and degree CCDFs. A plot
+    whose path is None is skipped, and so is output_data.txt if output_path
+    is None. If report_path is given, the time and memory of each stage are
+    written there as JSON.
+    """
+    report = Report("analyze")
+    with report.stage("load"):
+        g = load_edge_list(edge_list)
+    report.set("nodes", g.num_nodes)
+    report.set("edges", g.num_edges)
+
+    with report.stage("degrees"):
+        out_degree, in_degree = degrees(g)
+        out_hist, in_hist = align(degree_histogram(out_degree), degree_histogram(in_degree))
+
+    if histogram_path:
+        with report.stage("histogram"):
+            plot_degree_histograms(out_hist, in_hist, histogram_path, hist_bins,
+                                   (hist_bins[0], hist_bins[-1] + hist_bins.step), (0, hist_ylim))
+
+    print("Computing connected components...")
+
+    with report.stage("components"):
+        labels = connected_components(g)
+        giant = giant_component(labels)
+    num_components = int(labels.max()) + 1 if len(labels) else 0
+    # path lengths are only defined within a component
+    core = g if num_components <= 1 else g.subgraph(giant)
+    print(f"{num_components} components, giant component {core.num_nodes} nodes")
+    if num_components > 1:
+        print("component sizes (size: count):",
+              ", ".join(f"{s}: {c}" for s, c in sorted(size_distribution(labels).items(),
+                                                        reverse=True)))
+    report.set("components", num_components)
+    report.set("giant_nodes", core.num_nodes)
+
+    print("Computing Diameter...")
+
+    with report.stage("paths"):
+        results = path_lengths(core, workers)
+    results.update({"components": num_components, "giant_nodes": core.num_nodes})
+
+    print(f"Max diameter: {results['diameter']}")
+    print(f"Avg diameter: {results['avg_path_length']}")
+
+    print("Computing Clustering coefficients...")
+
+    with report.stage("clustering"):
+        results.update(clustering(core))
+
+    print(f"num triangles: {results['num_triangles']}")
+    print(f"num triplets: {results['num_triplets']}")
+    print(f"Clustering Coefficient: {results['clustering']}")
+    print(f"Avg Clustering Coefficient: {results['avg_clustering']}")
+
+    print("Computing ccdfs...")
+
+    with report.stage("ccdf"):
+        out_degree_ccdf, in_degree_ccdf = align(histogram_ccdf(out_hist, g.num_nodes),
+                                                histogram_ccdf(in_hist, g.num_nodes))
+        if ccdf_path:
+            plot_ccdfs(out_degree_ccdf, in_degree_ccdf, ccdf_path)
+
+    if output_path:
+        write_results(results, output_path)
+    if report_path:
+        report.write(report_path)
+        print(report.summary())
+    return results
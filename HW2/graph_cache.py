@@ -0,0 +1,107 @@
+"""
+An on-disk cache of the arrays parsed from an edge list, so repeated analyses
+of the same file skip pd.read_csv and the graph build. Each source file gets a
+directory of .npy files under .graph_cache/ next to it, named after the file
+and a key derived from its path, size and modification time (or, with
+content_hash, a hash of its contents) and the format version. Arrays are
+loaded memory-mapped, so a cached graph opens in milliseconds and processes
+analyzing the same graph share its pages through the OS page cache.
+
+Only plain arrays are stored: object arrays (e.g. string labels from pandas)
+are converted to fixed-width strings, and nothing is ever unpickled, so a
+cache directory cannot run code. A caller passes version to cached() and
+bumps it when what its build() returns changes, so old entries are not
+mistaken for the new layout.
+
+    arrays = cached("HW2/network.csv", build, version=1)   # build() -> {name: array}
+"""
+
+from typing import Callable, Dict, Optional
+import hashlib
+import os
+import shutil
+import tempfile
+import numpy as np
+
+CACHE_DIR = ".graph_cache"
+FORMAT_VERSION = 2      # of the files store() writes
+
+
+def cache_key(path, content_hash=False, version=0) -> str:
+    h = hashlib.sha1(f"{FORMAT_VERSION}:{version}:".encode())
+    if content_hash:
+        with open(path, "rb") as fp:
+            for block in iter(lambda: fp.read(1 << 20), b""):
+                h.update(block)
+    else:
+        st = os.stat(path)
+        h.update(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()[:16]
+
+
+def cache_path(path, key, cache_root=None) -> str:
+    if cache_root is None:
+        cache_root = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    return os.path.join(cache_root, f"{os.path.basename(path)}-{key}")
+
+
+def load(directory) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Memory-map every array in a cache directory, or None if it is missing or
+    holds a pickled array.
+    """
+    if not os.path.isdir(directory):
+        return None
+    arrays = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".npy"):
+            try:
+                arrays[name[:-4]] = np.load(os.path.join(directory, name), mmap_mode="r",
+                                            allow_pickle=False)
+            except ValueError:
+                return None
+    return arrays
+
+
+def store(directory, arrays: Dict[str, np.ndarray]):
+    """
+    Write arrays to a cache directory. The directory is built under a
+    temporary name and renamed into place, so readers never see it half
+    written. Older entries for the same source file are removed.
+    """
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    os.chmod(tmp, 0o755)    # mkdtemp creates it private to this user
+    try:
+        for name, array in arrays.items():
+            array = np.asarray(array)
+            if array.dtype == object:
+                array = array.astype(str)
+            np.save(os.path.join(tmp, name + ".npy"), array, allow_pickle=False)
+        os.rename(tmp, directory)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(directory):    # not just lost a race to another process
+            raise
+
+    stem = os.path.basename(directory).rsplit("-", 1)[0]
+    for entry in os.listdir(parent):
+        if entry.rsplit("-", 1)[0] == stem and entry != os.path.basename(directory):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def cached(path, build: Callable[[], Dict[str, np.ndarray]], cache_root=None,
+           content_hash=False, version=0) -> Dict[str, np.ndarray]:
+    """
+    The arrays for the file at path: memory-mapped from the cache if the file
+    has not changed since they were stored by the same version of build(),
+    otherwise built with build(), stored and then mapped.
+    """
+    directory = cache_path(path, cache_key(path, content_hash, version), cache_root)
+    arrays = load(directory)
+    if arrays is None:
+        shutil.rmtree(directory, ignore_errors=True)    # e.g. one holding a pickle
+        store(directory, build())
+        arrays = load(directory)
+    return arrays
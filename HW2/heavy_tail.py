@@ -0,0 +1,189 @@
+"""
+Heavy-tail statistics for samples and degree sequences.
+
+    top_share       - fraction of the total held by the largest r% of values
+    lorenz_curve    - the whole Lorenz curve
+    fit_power_law   - maximum-likelihood power-law fit with x_min chosen by
+                      minimizing the KS distance (Clauset, Shalizi and
+                      Newman, 2009)
+    bootstrap_p_value - goodness of fit of such a fit by the semi-parametric
+                      bootstrap, with the refits run in a process pool
+
+Each function sorts the data once and works from prefix or suffix sums, so
+the 80/20 curve for every r costs one sort and the power-law fit gets alpha
+for every candidate x_min from a single suffix sum.
+
+Usage: python HW2/heavy_tail.py EDGE_LIST [--bootstrap 200]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import argparse
+import os
+import numpy as np
+from scipy.special import zeta
+
+
+def top_share(data, r) -> np.ndarray:
+    """
+    Fraction of the sum of data held by its largest int(len(data) * r / 100)
+    values, for each percentage in r.
+    """
+    values = np.sort(np.asarray(data, dtype=np.float64))[::-1]
+    prefix = np.concatenate([[0.0], np.cumsum(values)])
+    counts = (len(values) * np.asarray(r, dtype=np.float64) / 100).astype(np.int64)
+    return prefix[counts] / prefix[-1]
+
+
+def lorenz_curve(data) -> Tuple[np.ndarray, np.ndarray]:
+    """ Cumulative population fraction and share of the total, smallest values first. """
+    values = np.sort(np.asarray(data, dtype=np.float64))
+    prefix = np.concatenate([[0.0], np.cumsum(values)])
+    return np.arange(len(values) + 1) / max(len(values), 1), prefix / prefix[-1]
+
+
+def _model_cdf(x, alpha, xmin, discrete) -> np.ndarray:
+    if discrete:
+        return 1 - zeta(alpha, x + 1) / zeta(alpha, xmin)
+    return 1 - (x / xmin) ** (1 - alpha)
+
+
+def _ks_distance(tail, alpha, xmin, discrete) -> float:
+    """ Largest gap between the empirical CDF of the sorted tail and the fitted one. """
+    values, counts = np.unique(tail, return_counts=True)
+    empirical = np.cumsum(counts) / len(tail)
+    model = _model_cdf(values, alpha, xmin, discrete)
+    # for continuous data the empirical CDF also jumps up to each value
+    below = np.concatenate([[0.0], empirical[:-1]])
+    gap = np.abs(empirical - model)
+    if not discrete:
+        gap = np.maximum(gap, np.abs(below - model))
+    return float(gap.max())
+
+
+def fit_power_law(data, xmin=None, discrete: Optional[bool] = None,
+                  min_tail=10, max_candidates=1000) -> Dict[str, float]:
+    """
+    Fit p(x) ~ x^-alpha for x >= xmin. If xmin is None every distinct value
+    leaving at least min_tail points in the tail is tried (at most
+    max_candidates of them, evenly spaced in rank, for continuous data with
+    many distinct values) and the one whose fit has the smallest KS distance
+    is kept. alpha is the continuous MLE 1 + n / sum(ln(x / xmin)), or for
+    discrete data (the default for integers) its approximation with
+    xmin - 1/2 in place of xmin. Values <= 0 are ignored.
+    """
+    x = np.asarray(data)
+    if discrete is None:
+        discrete = np.issubdtype(x.dtype, np.integer)
+    x = np.sort(x[x > 0].astype(np.float64))
+    n = len(x)
+    if n == 0:
+        raise ValueError("no positive values to fit")
+
+    # sum of ln x over the tail starting at each index
+    suffix = np.concatenate([np.cumsum(np.log(x)[::-1])[::-1], [0.0]])
+    candidates = np.unique(x) if xmin is None else np.array([float(xmin)])
+    starts = np.searchsorted(x, candidates)
+    tails = n - starts
+    keep = tails >= (min_tail if xmin is None else 1)
+    if not keep.any():
+        raise ValueError(f"fewer than {min_tail} values in any tail")
+    candidates, starts, tails = candidates[keep], starts[keep], tails[keep]
+    if len(candidates) > max_candidates:
+        pick = np.unique(np.linspace(0, len(candidates) - 1, max_candidates).astype(np.int64))
+        candidates, starts, tails = candidates[pick], starts[pick], tails[pick]
+    shift = 0.5 if discrete else 0.0
+    log_sums = suffix[starts] - tails * np.log(candidates - shift)
+    with np.errstate(divide='ignore'):
+        alphas = 1 + tails / log_sums
+
+    best = None
+    for candidate, start, alpha in zip(candidates, starts, alphas):
+        if not np.isfinite(alpha):
+            continue
+        ks = _ks_distance(x[start:], alpha, candidate, discrete)
+        if best is None or ks < best["ks"]:
+            best = {"alpha": float(alpha), "xmin": float(candidate), "ks": ks,
+                    "n_tail": int(n - start), "n": n, "discrete": bool(discrete)}
+    if best is None:
+        raise ValueError("the data has no tail to fit")
+    return best
+
+
+def sample_power_law(n, alpha, xmin, discrete, rng) -> np.ndarray:
+    """
+    n draws from the fitted power law by inverting its CDF, rounding the
+    continuous draw for discrete data (Clauset et al., appendix D).
+    """
+    u = rng.random(n)
+    if discrete:
+        return np.floor((xmin - 0.5) * (1 - u) ** (-1 / (alpha - 1)) + 0.5)
+    return xmin * (1 - u) ** (-1 / (alpha - 1))
+
+
+def _bootstrap_ks(args) -> float:
+    x, fit, min_tail, seed = args
+    rng = np.random.default_rng(seed)
+    # tail points come from the fitted power law and the rest are resampled
+    # from the data below xmin, each with the observed probability
+    body = x[x < fit["xmin"]]
+    from_tail = rng.binomial(len(x), fit["n_tail"] / len(x))
+    synthetic = np.concatenate([
+        sample_power_law(from_tail, fit["alpha"], fit["xmin"], fit["discrete"], rng),
+        rng.choice(body, size=len(x) - from_tail) if len(body) else np.zeros(0),
+    ])
+    try:
+        return fit_power_law(synthetic, discrete=fit["discrete"], min_tail=min_tail)["ks"]
+    except ValueError:
+        return np.inf
+
+
+def bootstrap_p_value(data, fit=None, samples=200, seed=None, workers=None,
+                      min_tail=10) -> Dict[str, float]:
+    """
+    Fraction of synthetic data sets drawn from the fitted model whose own best
+    fit is further from them (in KS distance) than fit is from data. A small
+    p-value (below 0.1) rules the power law out.
+    """
+    x = np.asarray(data)
+    if fit is None:
+        fit = fit_power_law(x, min_tail=min_tail)
+    x = x[x > 0].astype(np.float64)
+    seeds = np.random.SeedSequence(seed).spawn(samples)
+    jobs = [(x, fit, min_tail, s) for s in seeds]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        distances = [_bootstrap_ks(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            distances = list(pool.map(_bootstrap_ks, jobs, chunksize=max(1, samples // (4 * workers))))
+    distances = np.asarray(distances)
+    return {"p_value": float((distances >= fit["ks"]).mean()), "samples": samples}
+
+
+def main():
+    from graph_analysis import load_edge_list, degrees
+
+    parser = argparse.ArgumentParser(description="Power-law fits of the degree distributions of an edge list.")
+    parser.add_argument("edge_list")
+    parser.add_argument("--bootstrap", type=int, default=0,
+                        help="synthetic data sets for the goodness-of-fit p-value")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    out_degree, in_degree = degrees(load_edge_list(args.edge_list))
+    for name, values in (("out-degree", out_degree), ("in-degree", in_degree)):
+        fit = fit_power_law(values)
+        line = (f"{name}: alpha = {fit['alpha']:.3f}, xmin = {fit['xmin']:g}, "
+                f"KS = {fit['ks']:.4f}, tail {fit['n_tail']} of {fit['n']}")
+        if args.bootstrap:
+            gof = bootstrap_p_value(values, fit, args.bootstrap, args.seed, args.workers)
+            line += f", p = {gof['p_value']:.3f}"
+        top = top_share(values, [1, 20])
+        print(line + f"; top 1% hold {top[0]:.1%}, top 20% hold {top[1]:.1%}")
+
+
+if __name__ == "__main__":
+    main()
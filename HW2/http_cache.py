@@ -0,0 +1,150 @@
+"""
+An on-disk HTTP response cache for recrawls. Each HTML page fetched is stored
+under its canonical URL with the URL it redirected to and its validators
+(ETag and Last-Modified). Fetching the page again then either
+
+- serves it from disk without a request, if it was stored or revalidated
+  less than max_age seconds ago, or
+- sends a conditional request (If-None-Match / If-Modified-Since) to the
+  URL it redirected to, and reads the body from disk when the server answers
+  304 Not Modified, so an unchanged page costs one round trip and a few
+  hundred bytes of headers instead of the whole body.
+
+Only HTML responses of at most max_bytes are stored; anything else is
+fetched again every time, as without the cache.
+
+    cache = ResponseCache("HW2/http_cache")
+    real_url, body = cache.fetch(url, max_bytes)
+"""
+
+from typing import Dict, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import urlsplit, urlunsplit
+import hashlib
+import http.client
+import json
+import os
+import time
+import urllib.request
+
+CACHE_DIR = "HW2/http_cache"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    """
+    The cache key of url: lower-case scheme and host, no default port, no
+    fragment, and "/" for an empty path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, max_age=0.0, timeout=2):
+        self.directory = directory
+        self.max_age = max_age      # seconds a stored page is served without asking
+        self.timeout = timeout
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _write(self, path, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp, path)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """ The stored metadata of url, or None if it is not cached. """
+        try:
+            with open(self._path(url) + ".json") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def body(self, url: str) -> Optional[bytes]:
+        try:
+            with open(self._path(url) + ".body", "rb") as fp:
+                return fp.read()
+        except OSError:
+            return None
+
+    def put(self, url: str, final_url: str, headers, body: bytes):
+        """ Store a 200 response; the body goes first, so metadata always has one. """
+        path = self._path(url)
+        self._write(path + ".body", body)
+        self._touch(url, {
+            "url": canonical_url(url),
+            "final_url": final_url,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "size": len(body),
+        })
+
+    def _touch(self, url: str, entry: Dict):
+        entry["checked"] = time.time()
+        self._write(self._path(url) + ".json", json.dumps(entry).encode("utf-8"))
+
+    def fetch(self, url: str, max_bytes: int, report=None) -> Tuple[str, Optional[bytes]]:
+        """
+        The real (redirected) URL of url and its body, or None for the body if
+        it is not an HTML page, is larger than max_bytes or could not be
+        fetched. Counts cache_hits, cache_revalidated, cache_misses and
+        bytes_downloaded in report if one is given.
+        """
+        entry = self.get(url)
+        body = self.body(url) if entry is not None else None
+        if body is None:
+            entry = None
+        elif self.max_age and time.time() - entry["checked"] < self.max_age:
+            _count(report, "cache_hits")
+            return entry["final_url"], body
+
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        target = url
+        if entry is not None:
+            # validators belong to the page the request ended up at
+            target = entry["final_url"]
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        req = urllib.request.Request(url=target, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as usock:
+                real_url = usock.url
+                _count(report, "cache_misses")
+                if "text/html" not in (usock.headers.get('content-type') or ''):
+                    return real_url, None
+                length = usock.headers.get('content-length')
+                if length is not None and length.isdigit() and int(length) > max_bytes:
+                    return real_url, None
+                body = usock.read(max_bytes + 1)
+                _count(report, "bytes_downloaded", len(body))
+                if len(body) > max_bytes:
+                    return real_url, None
+                self.put(url, real_url, usock.headers, body)
+                return real_url, body
+        except HTTPError as e:
+            e.close()
+            if e.code == 304 and entry is not None:
+                _count(report, "cache_revalidated")
+                self._touch(url, entry)
+                return entry["final_url"], body
+            _count(report, "cache_misses")
+        except (OSError, http.client.HTTPException, ValueError):
+            _count(report, "cache_misses")
+        return url, None
+
+
+def _count(report, name, value=1):
+    if report is not None:
+        report.count(name, value)
+
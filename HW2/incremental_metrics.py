@@ -0,0 +1,167 @@
+"""
+Graph metrics maintained as edges arrive, so a growing crawl can be
+summarized at any point without re-running the analysis from scratch.
+IncrementalMetrics.add_edge updates the degree counts, the per-node triangle
+counts, the triplet count and the local clustering coefficients touched by
+one directed edge, in time proportional to the smaller endpoint's
+neighborhood. snapshot() gives the same numbers as graph_analysis.degrees
+and clustering.clustering_stats on the edges seen so far: duplicate edges
+are merged, and the undirected graph joins two nodes linked in either
+direction.
+
+The crawler's edge log can be followed while the crawl runs:
+
+    python HW2/incremental_metrics.py HW2/crawl_state/edges.bin --follow
+"""
+
+from array import array
+from typing import Dict, Hashable, Iterable, Tuple
+import argparse
+import os
+import time
+import numpy as np
+
+
+class IncrementalMetrics:
+    def __init__(self):
+        self.edges = set()          # directed (source, target) pairs seen
+        self.neighbors = {}         # node -> set of undirected neighbors, no self-loops
+        self.loops = set()          # nodes with a self-loop
+        self.out_degree = {}
+        self.in_degree = {}
+        self.triangles = {}         # node -> triangles through it
+        self.local = {}             # node -> local clustering coefficient
+        self.num_triangles = 0
+        self.num_triplets = 0
+        self.local_sum = 0.0
+
+    def _add_node(self, v):
+        if v not in self.neighbors:
+            self.neighbors[v] = set()
+            self.out_degree[v] = self.in_degree[v] = self.triangles[v] = 0
+            self.local[v] = 0.0
+
+    def _update_local(self, v):
+        d = len(self.neighbors[v])
+        local = 2 * self.triangles[v] / (d * (d - 1)) if d > 1 else 0.0
+        self.local_sum += local - self.local[v]
+        self.local[v] = local
+
+    # Degree counting a self-loop as a neighbor, which the triplet count uses.
+    def _loop_degree(self, v) -> int:
+        return len(self.neighbors[v]) + (v in self.loops)
+
+    def add_edge(self, source: Hashable, target: Hashable) -> bool:
+        """ Add the edge source -> target. Returns False if it was already present. """
+        if (source, target) in self.edges:
+            return False
+        self.edges.add((source, target))
+        self._add_node(source)
+        self._add_node(target)
+        self.out_degree[source] += 1
+        self.in_degree[target] += 1
+
+        if source == target:
+            if source not in self.loops:
+                self.num_triplets += self._loop_degree(source)
+                self.loops.add(source)
+            return True
+        if target in self.neighbors[source]:    # the reverse edge is already there
+            return True
+
+        # each common neighbor closes a new triangle
+        a, b = self.neighbors[source], self.neighbors[target]
+        common = a & b if len(a) <= len(b) else b & a
+        for w in common:
+            self.triangles[w] += 1
+            self._update_local(w)
+        self.triangles[source] += len(common)
+        self.triangles[target] += len(common)
+        self.num_triangles += len(common)
+
+        self.num_triplets += self._loop_degree(source) + self._loop_degree(target)
+        a.add(target)
+        b.add(source)
+        self._update_local(source)
+        self._update_local(target)
+        return True
+
+    def add_edges(self, edges: Iterable[Tuple[Hashable, Hashable]]) -> int:
+        """ Add every (source, target) pair and return how many were new. """
+        return sum(self.add_edge(s, t) for s, t in edges)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.neighbors)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+    def degrees(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Node labels in sorted order and their out- and in-degrees. """
+        labels = np.array(sorted(self.neighbors))
+        out_degree = np.array([self.out_degree[v] for v in labels.tolist()], dtype=np.int64)
+        in_degree = np.array([self.in_degree[v] for v in labels.tolist()], dtype=np.int64)
+        return labels, out_degree, in_degree
+
+    def clustering_stats(self) -> Dict[str, float]:
+        """ The same dictionary as clustering.clustering_stats. """
+        return {
+            "num_triangles": self.num_triangles,
+            "num_triplets": self.num_triplets,
+            "clustering": (3 * self.num_triangles / self.num_triplets
+                           if self.num_triplets else 0.0),
+            "avg_clustering": self.local_sum / self.num_nodes if self.num_nodes else 0.0,
+        }
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"num_nodes": self.num_nodes, "num_edges": self.num_edges,
+                **self.clustering_stats()}
+
+
+def follow_edge_log(path, metrics: IncrementalMetrics, offset=0, block=1 << 14) -> int:
+    """
+    Add the edges written to an edge log (resumable_crawler.EdgeLog) after
+    byte offset, reading up to block edges at a time, and return the offset
+    to continue from. A resumed crawl truncates the log to its last
+    checkpoint; edges past that point are already in metrics and are ignored
+    as duplicates when written again.
+    """
+    size = os.path.getsize(path)
+    offset = min(offset, size)
+    pair = 2 * array('I').itemsize
+    with open(path, "rb") as fp:
+        fp.seek(offset)
+        while True:
+            data = fp.read(min(block * pair, size - offset) // pair * pair)
+            if not data:
+                return offset
+            ids = array('I')
+            ids.frombytes(data)
+            metrics.add_edges(zip(ids[0::2], ids[1::2]))
+            offset += len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics of a crawl edge log, updated as it grows.")
+    parser.add_argument("edge_log", nargs="?", default="HW2/crawl_state/edges.bin")
+    parser.add_argument("--follow", action="store_true", help="keep reading as the log grows")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between reads")
+    args = parser.parse_args()
+
+    metrics = IncrementalMetrics()
+    offset = 0
+    while True:
+        offset = follow_edge_log(args.edge_log, metrics, offset)
+        stats = metrics.snapshot()
+        print(f"{stats['num_nodes']} nodes, {stats['num_edges']} edges, "
+              f"{stats['num_triangles']} triangles, clustering {stats['clustering']:.4f}, "
+              f"avg clustering {stats['avg_clustering']:.4f}", flush=True)
+        if not args.follow:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Lightweight run instrumentation for the crawlers and the analysis: a Report
+collects per-stage wall time and memory, counters (pages, bytes), gauges
+(queue depth) and latency histograms, and is written out as one JSON file
+per run so runs can be compared.
+
+    report = Report("crawl")
+    with report.stage("fetch"):
+        ...
+        report.observe("fetch_seconds", latency)
+        report.count("bytes_downloaded", len(chunk))
+    report.write("crawl_report.json")
+
+Everything is cheap enough to leave on: a stage costs two clock reads and a
+getrusage call. Stage memory is the process's peak RSS, which only grows, so
+a stage's rss_growth_mb is how much it raised the peak; pass
+trace_memory=True for tracemalloc's per-stage peak of Python allocations,
+which is exact but slows allocation-heavy code down several times.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import json
+import math
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+# Top-level keys of a written report, which Report.set can't take as names
+RESERVED = frozenset(["name", "started", "argv", "total_seconds", "peak_rss_mb", "stages",
+                      "counters", "gauges", "histograms"])
+
+
+def peak_rss_mb() -> Optional[float]:
+    """ Peak resident set size of this process so far, in MB. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class Histogram:
+    """
+    Counts of observations in power-of-two buckets: bucket i holds values in
+    [base * 2^(i-1), base * 2^i), bucket 0 everything below base. Quantiles
+    are estimated as the upper bound of the bucket they fall in.
+    """
+    def __init__(self, base=1e-3):
+        self.base = base
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        i = 0 if value < self.base else int(math.log2(value / self.base)) + 1
+        self.buckets[i] = self.buckets.get(i, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        seen = 0
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen >= q * self.count:
+                return min(self.base * 2 ** i, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count, "mean": self.total / self.count,
+            "min": self.min, "max": self.max,
+            "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99),
+            # upper bound of each bucket -> count
+            "buckets": {f"{self.base * 2 ** i:.6g}": n for i, n in sorted(self.buckets.items())},
+        }
+
+
+class Report:
+    def __init__(self, name: str, trace_memory=False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.stages: List[Dict] = []
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, Dict[str, float]] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.values: Dict[str, object] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """ Time the enclosed block and record the memory it used as stage name. """
+        rss_before = peak_rss_mb()
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {"name": name, "seconds": time.perf_counter() - start}
+            rss_after = peak_rss_mb()
+            if rss_after is not None:
+                record["peak_rss_mb"] = rss_after
+                record["rss_growth_mb"] = rss_after - rss_before
+            if self.trace_memory:
+                record["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                if tracing:
+                    tracemalloc.stop()
+            self.stages.append(record)
+
+    def count(self, name: str, value: float = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        """ Record the current value of a quantity such as the queue depth. """
+        g = self.gauges.setdefault(name, {"last": value, "max": value, "samples": 0, "sum": 0.0})
+        g["last"] = value
+        g["max"] = max(g["max"], value)
+        g["samples"] += 1
+        g["sum"] += value
+
+    def observe(self, name: str, value: float):
+        """ Add value to the histogram name, e.g. one fetch latency. """
+        self.histograms.setdefault(name, Histogram()).add(value)
+
+    def set(self, name: str, value):
+        """ Record a result of the run, written at the top level of the report. """
+        if name in RESERVED:
+            raise ValueError(f"{name!r} is a reserved report key")
+        self.values[name] = value
+
+    def stage_seconds(self, *names) -> float:
+        return sum(s["seconds"] for s in self.stages if s["name"] in names)
+
+    def to_dict(self) -> Dict:
+        gauges = {name: {"last": g["last"], "max": g["max"],
+                         "mean": g["sum"] / g["samples"] if g["samples"] else 0.0}
+                  for name, g in self.gauges.items()}
+        return {
+            "name": self.name,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "argv": sys.argv,
+            "total_seconds": time.perf_counter() - self.start,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "counters": self.counters,
+            "gauges": gauges,
+            "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            **self.values,
+        }
+
+    def write(self, path):
+        with open(path, "w") as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+    def summary(self) -> str:
+        lines = [f"{self.name}: {time.perf_counter() - self.start:.2f}s total"]
+        for s in self.stages:
+            memory = f", peak RSS {s['peak_rss_mb']:.0f}MB" if "peak_rss_mb" in s else ""
+            lines.append(f"  {s['name']:>12}: {s['seconds']:8.2f}s{memory}")
+        for name, h in self.histograms.items():
+            if h.count:
+                lines.append(f"  {name}: mean {h.total / h.count:.3f}, "
+                             f"p50 {h.quantile(0.5):.3f}, p99 {h.quantile(0.99):.3f}")
+        for name, value in self.counters.items():
+            lines.append(f"  {name}: {value:g}")
+        return "\n".join(lines)
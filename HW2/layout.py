@@ -0,0 +1,250 @@
+"""
+Force-directed layout and rendering for large graphs, replacing
+nx.kamada_kawai_layout (dense all-pairs distances), nx.spring_layout and
+nx.draw in web_visualizer.py.
+
+The layout is Fruchterman–Reingold on NumPy arrays, made scalable in two
+ways:
+
+- Multilevel: the graph is coarsened repeatedly by merging nodes into
+  neighboring "leader" nodes until it is small, the coarsest graph is laid
+  out from scratch, and each finer level starts from the positions of its
+  coarse nodes and only needs a few refining iterations.
+- Repulsion is computed on a grid instead of between all pairs (the
+  particle-mesh counterpart of Barnes–Hut): node masses are spread onto a
+  G x G grid, convolved by FFT with the repulsive force kernel, and read back
+  at each node, so one iteration costs O(n + m + G^2 log G).
+
+Positions are cached under .graph_cache/layouts next to the edge list, as
+the parsed arrays are (see graph_cache), keyed by a hash of the adjacency
+arrays and the layout parameters, so re-rendering the same graph skips the
+layout. draw() renders all edges as one LineCollection and all
+nodes as one scatter, which handles 10^5 nodes in seconds where nx.draw
+draws each edge as its own artist.
+"""
+
+from typing import Optional
+import hashlib
+import os
+import numpy as np
+import scipy.fft
+import scipy.sparse as sp
+
+from clustering import binary_adjacency
+from graph_cache import CACHE_DIR
+
+COARSEST = 100      # stop coarsening below this many nodes
+GRAVITY = 0.1       # pull toward the center, so components don't drift apart
+
+
+def _coarsen(A, mass, rng):
+    """
+    One level of coarsening: about half the nodes become leaders at random,
+    every other node joins its neighboring leader of highest random priority,
+    and nodes with no leader neighbor stay alone. Returns the coarse
+    adjacency (edge weights summed), the coarse masses and the coarse node of
+    every node.
+    """
+    n = A.shape[0]
+    priority = rng.random(n)
+    leader = priority < 0.5
+    # each entry's score is its column's priority if that column is a leader;
+    # the last entry of each row after sorting by (row, score) is the best
+    rows = np.repeat(np.arange(n), np.diff(A.indptr))
+    score = np.where(leader[A.indices], priority[A.indices], -1.0)
+    order = np.lexsort((score, rows))
+    last = order[A.indptr[1:][np.diff(A.indptr) > 0] - 1]
+    joins = ~leader[rows[last]] & (score[last] >= 0)
+    parent = np.arange(n)
+    parent[rows[last][joins]] = A.indices[last][joins]
+
+    roots, cluster = np.unique(parent, return_inverse=True)
+    P = sp.csr_matrix((np.ones(n), (np.arange(n), cluster)), shape=(n, len(roots)))
+    coarse = (P.T @ A @ P).tocsr()
+    coarse.setdiag(0)
+    coarse.eliminate_zeros()
+    return coarse, P.T @ mass, cluster
+
+
+def _repulsion_kernel(G):
+    """ FFT of the x and y unit repulsion kernels d / |d|^2 on a (2G-1)^2 grid of offsets. """
+    offsets = np.arange(-(G - 1), G, dtype=np.float64)
+    dx, dy = np.meshgrid(offsets, offsets, indexing='ij')
+    r2 = dx ** 2 + dy ** 2
+    r2[G - 1, G - 1] = 1
+    size = scipy.fft.next_fast_len(3 * G - 2)
+    kx, ky = dx / r2, dy / r2
+    return size, scipy.fft.rfft2(kx, (size, size)), scipy.fft.rfft2(ky, (size, size))
+
+
+def _spread(pos, lo, h, G):
+    """ Cloud-in-cell grid coordinates: the lower-left cell of each node and its weights. """
+    cell = (pos - lo) / h
+    base = np.clip(np.floor(cell).astype(np.int64), 0, G - 2)
+    frac = np.clip(cell - base, 0, 1)
+    return base, frac
+
+
+def _grid_repulsion(pos, mass, k, G, kernel):
+    """ Repulsive force k^2 / d between all pairs of nodes, approximated on a G x G grid. """
+    size, fx, fy = kernel
+    lo = pos.min(axis=0)
+    h = max(float((pos.max(axis=0) - lo).max()) / (G - 1), 1e-12)
+    base, frac = _spread(pos, lo, h, G)
+    corners = [(0, 0), (1, 0), (0, 1), (1, 1)]
+    weights = [(1 - frac[:, 0] if a == 0 else frac[:, 0]) * (1 - frac[:, 1] if b == 0 else frac[:, 1])
+               for a, b in corners]
+
+    density = np.zeros(G * G)
+    for (a, b), w in zip(corners, weights):
+        density += np.bincount((base[:, 0] + a) * G + base[:, 1] + b, weights=w * mass,
+                               minlength=G * G)
+    spectrum = scipy.fft.rfft2(density.reshape(G, G), (size, size))
+    field = []
+    for kernel_fft in (fx, fy):
+        full = scipy.fft.irfft2(spectrum * kernel_fft, (size, size))
+        field.append(full[G - 1:2 * G - 1, G - 1:2 * G - 1].ravel())
+
+    force = np.zeros_like(pos)
+    for (a, b), w in zip(corners, weights):
+        cells = (base[:, 0] + a) * G + base[:, 1] + b
+        force[:, 0] += w * field[0][cells]
+        force[:, 1] += w * field[1][cells]
+    return force * (k * k / h)
+
+
+def _refine(A, pos, mass, iterations, temperature):
+    """ Fruchterman–Reingold iterations with linear cooling, starting from pos. """
+    n = A.shape[0]
+    if n == 1:
+        return np.zeros((1, 2))
+    k = 1 / np.sqrt(n)
+    G = int(np.clip(np.sqrt(n) / 2, 16, 128))
+    kernel = _repulsion_kernel(G)
+    upper = sp.triu(A, k=1).tocoo()
+    rows, cols, weight = upper.row, upper.col, upper.data.astype(np.float64)
+
+    for i in range(iterations):
+        t = temperature * (1 - i / iterations)
+        force = _grid_repulsion(pos, mass, k, G, kernel)
+        delta = pos[cols] - pos[rows]
+        distance = np.sqrt((delta ** 2).sum(axis=1))[:, None]
+        pull = delta * distance * weight[:, None] / k
+        for axis in range(2):
+            force[:, axis] += np.bincount(rows, pull[:, axis], minlength=n)
+            force[:, axis] -= np.bincount(cols, pull[:, axis], minlength=n)
+        force /= mass[:, None]
+        force -= GRAVITY * (pos - pos.mean(axis=0)) / k
+        length = np.sqrt((force ** 2).sum(axis=1))[:, None]
+        pos = pos + force / np.maximum(length, 1e-12) * np.minimum(length, t)
+    return pos
+
+
+def force_layout(adj, seed=None, iterations=50, refine_iterations=30) -> np.ndarray:
+    """
+    Multilevel force-directed positions, an (n, 2) array scaled to [-1, 1],
+    for the undirected graph with adjacency adj.
+    """
+    A = binary_adjacency(adj, drop_loops=True).astype(np.float64)
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros((0, 2))
+    rng = np.random.default_rng(seed)
+
+    levels = [(A, np.ones(n))]
+    clusters = []
+    while levels[-1][0].shape[0] > COARSEST:
+        coarse, mass, cluster = _coarsen(*levels[-1], rng)
+        if coarse.shape[0] > 0.9 * levels[-1][0].shape[0]:
+            break
+        levels.append((coarse, mass))
+        clusters.append(cluster)
+
+    A_c, mass = levels[-1]
+    pos = rng.random((A_c.shape[0], 2))
+    pos = _refine(A_c, pos, mass, iterations, 0.1)
+    for (A_l, mass), cluster in zip(reversed(levels[:-1]), reversed(clusters)):
+        k = 1 / np.sqrt(A_l.shape[0])
+        pos = pos[cluster] + rng.normal(scale=k / 4, size=(A_l.shape[0], 2))
+        pos = _refine(A_l, pos, mass, refine_iterations, 2 * k)
+    return rescale(pos)
+
+
+def rescale(pos) -> np.ndarray:
+    """ Center positions and scale them into [-1, 1], as nx.rescale_layout. """
+    pos = pos - pos.mean(axis=0)
+    extent = np.abs(pos).max()
+    return pos / extent if extent > 0 else pos
+
+
+def circular_layout(n) -> np.ndarray:
+    theta = np.arange(n) * 2 * np.pi / max(n, 1)
+    return np.column_stack([np.cos(theta), np.sin(theta)])
+
+
+def graph_hash(adj) -> str:
+    A = sp.csr_matrix(adj)
+    h = hashlib.sha1()
+    h.update(np.asarray(A.shape, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(A.indptr, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(A.indices, dtype=np.int64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def cached_layout(adj, edge_list, cache_root=None, **params) -> np.ndarray:
+    """
+    force_layout(adj, **params) for a graph read from edge_list, loaded from
+    cache_root/layouts (by default .graph_cache/ next to edge_list) if this
+    graph was laid out with the same parameters before.
+    """
+    if cache_root is None:
+        cache_root = os.path.join(os.path.dirname(os.path.abspath(edge_list)), CACHE_DIR)
+    key = hashlib.sha1(f"{graph_hash(adj)}:{sorted(params.items())}".encode()).hexdigest()[:16]
+    directory = os.path.join(cache_root, "layouts")
+    path = os.path.join(directory, key + ".npy")
+    if os.path.exists(path):
+        return np.load(path)
+    pos = force_layout(adj, **params)
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, pos)
+    os.replace(tmp, path)
+    return pos
+
+
+def draw(adj, pos, path=None, node_color=None, cmap="cool", node_size=None, width=0.3,
+         labels: Optional[np.ndarray] = None, title=None, ax=None, figsize=(18, 8)):
+    """
+    Draw the undirected graph adj at positions pos: every edge in one
+    LineCollection and every node in one scatter call. labels, if given,
+    are written on the nodes (only sensible for small graphs). Saves the
+    figure to path if given.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    n = len(pos)
+    if ax is None:
+        fig, ax = plt.subplots(figsize=figsize)
+    upper = sp.triu(sp.csr_matrix(adj), k=1).tocoo()
+    segments = np.stack([pos[upper.row], pos[upper.col]], axis=1)
+    large = n > 1000
+    # antialiasing hundreds of thousands of overlapping lines costs more than it shows
+    ax.add_collection(LineCollection(segments, linewidths=width, colors="black",
+                                     alpha=0.5 if large else 1.0, antialiaseds=not large,
+                                     zorder=1))
+    if node_size is None:
+        node_size = 300 if n <= 300 else max(1, 30000 / n)
+    ax.scatter(pos[:, 0], pos[:, 1], s=node_size, c=node_color,
+               cmap=cmap if node_color is not None else None, zorder=2, linewidths=0)
+    if labels is not None:
+        for (x, y), label in zip(pos, labels):
+            ax.text(x, y, str(label), fontsize=8, ha='center', va='center', zorder=3)
+    ax.set_aspect('equal', adjustable='datalim')
+    ax.autoscale_view()
+    ax.set_axis_off()
+    if title:
+        ax.set_title(title)
+    if path:
+        ax.figure.savefig(path)
+    return ax
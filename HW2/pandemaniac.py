@@ -0,0 +1,268 @@
+"""
+A simulator for Pandemaniac's competitive diffusion and seed selectors
+built on it.
+
+The game: each player picks k seed nodes, and a node picked by more than
+one player starts uncolored. Then, every round, each node tallies the
+colors of its neighbors, with a colored node adding 1.5 votes for its own
+color. If the top color has more than half as many votes as the node has
+neighbors, the node takes that color. The game ends when a round changes
+nothing, or after max_rounds rounds. A player's score is the number of
+nodes of its color. This is the rule of the competition's own simulator,
+which loops over a dictionary of nodes.
+
+Here a round is one sparse product for many games at once. The colors of G
+games with P players form an n x (G * P) one-hot matrix X, A @ X + 1.5 X
+gives every node's votes in every game, and the argmax over each game's P
+columns gives the update. Games that have settled drop out of the batch.
+evaluate() splits larger batches across a process pool.
+
+Selectors:
+
+    degree_seeds        - the k nodes of highest degree
+    discount_seeds      - highest degree, not counting links to the seeds
+                          already chosen, so seeds do not crowd one hub
+    centrality_seeds    - top k by pagerank, betweenness or closeness
+    best_response       - random mixes of the above, played in batch
+                          against the expected opponents; the best is kept
+
+Usage: python HW2/pandemaniac.py GRAPH.json --seeds 10 [--strategy best --against degree]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Sequence, Tuple
+import argparse
+import json
+import os
+import numpy as np
+import scipy.sparse as sp
+
+from clustering import binary_adjacency
+from centrality import (betweenness_centrality, closeness_centrality, pagerank,
+                        top_k)
+
+MAX_ROUNDS = 200        # the competition stops after 100 to 200 rounds
+SELF_VOTES = 1.5        # votes a colored node casts for its own color
+SUBMISSION_ROUNDS = 50  # games per submission, each needing its own seeds
+
+Game = Sequence[Sequence[int]]      # one seed list per player
+
+
+def load_graph(path) -> Tuple[sp.csr_matrix, np.ndarray]:
+    """
+    A competition graph, a JSON object mapping each node to its list of
+    neighbors, as a symmetric adjacency matrix and the node names.
+    """
+    with open(path) as fp:
+        adjacency_list = json.load(fp)
+    # numeric names in numeric order
+    labels = np.array(sorted(adjacency_list, key=lambda v: (len(v), v)))
+    index = {v: i for i, v in enumerate(labels.tolist())}
+    rows = np.repeat(np.arange(len(labels)),
+                     [len(adjacency_list[v]) for v in labels.tolist()])
+    cols = np.array([index[u] for v in labels.tolist() for u in adjacency_list[v]],
+                    dtype=np.int64)
+    A = sp.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                      shape=(len(labels), len(labels)))
+    return binary_adjacency(A + A.T, drop_loops=True), labels
+
+
+def _vote_matrix(adj) -> sp.csr_matrix:
+    return binary_adjacency(adj, drop_loops=True).astype(np.float32)
+
+
+def initial_colors(n, games: Sequence[Game]) -> np.ndarray:
+    """
+    (n, G) colors at the start of each game: the player's index on its
+    seeds, -1 elsewhere, including on nodes several players picked.
+    """
+    colors = np.full((n, len(games)), -1, dtype=np.int16)
+    for g, game in enumerate(games):
+        seeds = [np.unique(np.asarray(s, dtype=np.int64)) for s in game]
+        picked = np.bincount(np.concatenate(seeds), minlength=n) if seeds else np.zeros(n)
+        for player, s in enumerate(seeds):
+            colors[s[picked[s] == 1], g] = player
+    return colors
+
+
+def _play(A, colors, players, max_rounds) -> np.ndarray:
+    """ Run the games in the columns of colors to the end; returns their final colors. """
+    n = A.shape[0]
+    half = (np.diff(A.indptr) / 2)[:, None]
+    colors = colors.copy()
+    active = np.arange(colors.shape[1])
+    palette = np.arange(players)
+    for _ in range(max_rounds):
+        if len(active) == 0:
+            break
+        current = colors[:, active]
+        onehot = (current[:, :, None] == palette).reshape(n, -1).astype(np.float32)
+        votes = (A @ onehot + SELF_VOTES * onehot).reshape(n, len(active), players)
+        best = votes.argmax(axis=2)
+        wins = np.take_along_axis(votes, best[:, :, None], axis=2)[:, :, 0] > half
+        updated = np.where(wins, best, current).astype(colors.dtype)
+        changed = (updated != current).any(axis=0)
+        colors[:, active] = updated
+        active = active[changed]
+    return colors
+
+
+def _scores(colors, players) -> np.ndarray:
+    return (colors[:, :, None] == np.arange(players)).sum(axis=0)
+
+
+def _play_batch(A, games, players, max_rounds) -> np.ndarray:
+    colors = _play(A, initial_colors(A.shape[0], games), players, max_rounds)
+    return _scores(colors, players)
+
+
+def simulate(adj, game: Game, max_rounds=MAX_ROUNDS) -> Dict[str, np.ndarray]:
+    """ Play one game; returns the final color of every node and each player's node count. """
+    A = _vote_matrix(adj)
+    colors = _play(A, initial_colors(A.shape[0], [game]), len(game), max_rounds)[:, 0]
+    return {"colors": colors, "scores": np.bincount(colors[colors >= 0], minlength=len(game))}
+
+
+_worker_adjacency = None
+
+def _init_worker(A):
+    global _worker_adjacency
+    _worker_adjacency = A
+
+def _worker_batch(args):
+    return _play_batch(_worker_adjacency, *args)
+
+
+def evaluate(adj, games: Sequence[Game], max_rounds=MAX_ROUNDS, workers=None,
+             batch=32) -> np.ndarray:
+    """
+    Play every game, each a list of one seed list per player (all games
+    must have the same number of players), and return the (G, P) node
+    counts. Games are played batch at a time, in a process pool when
+    workers > 1.
+    """
+    if not games:
+        return np.zeros((0, 0), dtype=np.int64)
+    A = _vote_matrix(adj)
+    players = len(games[0])
+    if any(len(game) != players for game in games):
+        raise ValueError("every game needs the same number of players")
+    jobs = [(games[i:i + batch], players, max_rounds) for i in range(0, len(games), batch)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        results = [_play_batch(A, *job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(A,)) as pool:
+            results = list(pool.map(_worker_batch, jobs))
+    return np.concatenate(results)
+
+
+def degree_seeds(adj, k) -> np.ndarray:
+    degree = np.diff(binary_adjacency(adj, drop_loops=True).indptr)
+    return np.array([v for v, _ in top_k(degree, k)], dtype=np.int64)
+
+
+def discount_seeds(adj, k) -> np.ndarray:
+    """
+    Seeds by single-discount degree (Chen, Wang and Yang, 2009): after each
+    pick, its neighbors' degrees drop by one.
+    """
+    A = binary_adjacency(adj, drop_loops=True)
+    degree = np.diff(A.indptr).astype(np.float64)
+    seeds = []
+    for _ in range(min(k, A.shape[0])):
+        v = int(np.argmax(degree))
+        seeds.append(v)
+        degree[A.indices[A.indptr[v]:A.indptr[v + 1]]] -= 1
+        degree[v] = -np.inf
+    return np.array(seeds, dtype=np.int64)
+
+
+def centrality_seeds(adj, k, measure="pagerank", samples=None, seed=None,
+                     workers=None) -> np.ndarray:
+    """ The top k nodes by a centrality.py measure on the undirected graph. """
+    A = binary_adjacency(adj, drop_loops=True)
+    if measure == "pagerank":
+        scores = pagerank(A)
+    elif measure == "betweenness":
+        scores = betweenness_centrality(A, samples, seed=seed, workers=workers)
+    elif measure == "closeness":
+        scores = closeness_centrality(A, workers)
+    else:
+        raise ValueError(f"unknown measure {measure}")
+    return np.array([v for v, _ in top_k(scores, k)], dtype=np.int64)
+
+
+SELECTORS = {
+    "degree": degree_seeds,
+    "discount": discount_seeds,
+    "pagerank": lambda adj, k: centrality_seeds(adj, k, "pagerank"),
+    "betweenness": lambda adj, k: centrality_seeds(adj, k, "betweenness", samples=500, seed=0),
+}
+
+
+def best_response(adj, k, opponents: Sequence[Game], candidates=256, pool_factor=2,
+                  selectors=("degree", "discount", "pagerank"), seed=None,
+                  max_rounds=MAX_ROUNDS, workers=None) -> Dict:
+    """
+    The best of the selectors' own seed sets and candidates random k-subsets
+    of the union of their top pool_factor * k nodes, where a seed set's
+    score is its mean share of the nodes over the games against each entry
+    of opponents (the other players' seed lists). Returns the seeds, their
+    mean share and how many games were played.
+    """
+    A = binary_adjacency(adj, drop_loops=True)
+    n = A.shape[0]
+    rng = np.random.default_rng(seed)
+    heuristic = [SELECTORS[name](A, k) for name in selectors]
+    pool = np.unique(np.concatenate([SELECTORS[name](A, pool_factor * k) for name in selectors]))
+    sets = heuristic + [rng.choice(pool, size=min(k, len(pool)), replace=False)
+                        for _ in range(candidates)]
+
+    games = [[s, *others] for s in sets for others in opponents]
+    scores = evaluate(A, games, max_rounds, workers)[:, 0].reshape(len(sets), len(opponents))
+    share = scores.mean(axis=1) / n
+    best = int(np.argmax(share))
+    return {"seeds": np.sort(sets[best]), "share": float(share[best]), "games": len(games)}
+
+
+def write_submission(seeds: Sequence, path, rounds=SUBMISSION_ROUNDS):
+    """ The competition's submission file: the seed names, one per line, once per round. """
+    with open(path, "w") as fp:
+        for _ in range(rounds):
+            fp.writelines(f"{v}\n" for v in seeds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Choose Pandemaniac seeds for a graph.")
+    parser.add_argument("graph", help="competition JSON adjacency list")
+    parser.add_argument("--seeds", type=int, default=10, help="seeds per player")
+    parser.add_argument("--strategy", default="best", choices=[*SELECTORS, "best"])
+    parser.add_argument("--against", nargs="+", default=["degree"],
+                        help="opponents' strategies, one per other player")
+    parser.add_argument("--candidates", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="write a submission file here")
+    args = parser.parse_args()
+
+    A, labels = load_graph(args.graph)
+    others = [SELECTORS[name](A, args.seeds) for name in args.against]
+    if args.strategy == "best":
+        result = best_response(A, args.seeds, [others], args.candidates, seed=args.seed,
+                               workers=args.workers)
+        seeds = result["seeds"]
+        print(f"{result['games']} games played")
+    else:
+        seeds = SELECTORS[args.strategy](A, args.seeds)
+    scores = simulate(A, [seeds, *others])["scores"]
+    print(f"seeds: {' '.join(labels[seeds].tolist())}")
+    print(f"nodes won against {', '.join(args.against)}: {scores.tolist()} of {A.shape[0]}")
+    if args.out:
+        write_submission(labels[seeds].tolist(), args.out)
+
+
+if __name__ == "__main__":
+    main()
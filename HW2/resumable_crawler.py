@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+"""
+A resumable version of fetcher3.crawl. Discovered edges are streamed to an
+append-only log and the BFS frontier lives in an append-only file on disk, so
+neither grows in memory with the size of the crawl. Every checkpoint_every
+pages (and on Ctrl-C) the URL table, frontier position and visited bitmap are
+checkpointed, and running the crawl again with the same state directory picks
+up where it stopped instead of starting over. Only pages fetched after the
+last checkpoint are fetched again. With cache_dir, pages are kept in an HTTP
+cache (http_cache.py), so a fresh crawl of the same site only downloads the
+pages that changed.
+
+State directory layout:
+    urls.txt         - one URL per line, line k is the URL with ID k + 1
+    edges.bin        - (source, target) uint32 ID pairs, in discovery order
+    frontier.bin     - uint32 IDs of queued pages, in BFS order
+    visited.N.bin    - visited bitmap of checkpoint N
+    checkpoint.json  - file lengths, counters and the visited bitmap's name at
+                       the last checkpoint
+
+A checkpoint writes a new visited bitmap beside the old one and then
+replaces checkpoint.json, so the replace is the single point where the
+checkpoint changes: a crash before it leaves the previous checkpoint and
+its bitmap intact.
+
+Run "python HW2/resumable_crawler.py [state_dir]" to crawl caltech.edu.
+"""
+
+from array import array
+from typing import Iterator, Optional, Tuple
+import json
+import os
+import sys
+import time
+
+from fetcher3 import (fetch_links_timed, write_network, RESTRICTED_DOMAIN, START,
+                      MIN_CRAWLS)
+from url_store import UrlStore, VisitedSet
+from instrumentation import Report
+from http_cache import ResponseCache
+
+CHECKPOINT_EVERY = 50   # pages between checkpoints
+BLOCK = 1 << 14         # IDs read from or buffered for a file at a time
+
+
+def _truncate(path, size):
+    with open(path, "ab") as fp:
+        fp.truncate(size)
+
+
+def _sync(fp):
+    fp.flush()
+    os.fsync(fp.fileno())
+
+
+class EdgeLog:
+    """ An append-only on-disk log of (source, target) ID pairs. """
+    def __init__(self, path):
+        self.path = path
+        self.fp = open(path, "ab")
+        self.buffer = array('I')
+
+    def append(self, source: int, target: int):
+        self.buffer.append(source)
+        self.buffer.append(target)
+        if len(self.buffer) >= BLOCK:
+            self.flush()
+
+    def flush(self):
+        self.buffer.tofile(self.fp)
+        self.buffer = array('I')
+
+    def sync(self) -> int:
+        """ Write buffered edges to disk and return the log's length in bytes. """
+        self.flush()
+        _sync(self.fp)
+        return self.fp.tell()
+
+    def close(self):
+        self.flush()
+        self.fp.close()
+
+
+# Stream the (source, target) pairs of an edge log without loading it.
+def read_edge_log(path) -> Iterator[Tuple[int, int]]:
+    with open(path, "rb") as fp:
+        while True:
+            block = array('I')
+            block.frombytes(fp.read(2 * BLOCK * block.itemsize))
+            if not block:
+                return
+            yield from zip(block[0::2], block[1::2])
+
+
+class FileQueue:
+    """
+    A FIFO queue of IDs backed by an append-only file. New IDs are appended to
+    the end of the file and IDs are read from head, so only a block of IDs at
+    each end is held in memory.
+    """
+    def __init__(self, path, head=0):
+        self.path = path
+        self.fp = open(path, "a+b")
+        self.fp.seek(0, os.SEEK_END)
+        self.tail = self.fp.tell() // 4   # IDs written to the file
+        self.head = head                  # IDs consumed from the front
+        self.pending = array('I')         # appended IDs not yet written
+        self.block = array('I')           # IDs read from the file, not consumed
+        self.block_pos = 0
+
+    def __len__(self):
+        return self.tail + len(self.pending) - self.head
+
+    def append(self, i: int):
+        self.pending.append(i)
+        if len(self.pending) >= BLOCK:
+            self.flush()
+
+    def flush(self):
+        self.fp.seek(0, os.SEEK_END)
+        self.pending.tofile(self.fp)
+        self.tail += len(self.pending)
+        self.pending = array('I')
+
+    def peek(self) -> Optional[int]:
+        if self.block_pos == len(self.block):
+            if self.head == self.tail:
+                self.flush()
+            self.fp.seek(4 * self.head)
+            self.block = array('I')
+            self.block.frombytes(self.fp.read(4 * min(BLOCK, self.tail - self.head)))
+            self.block_pos = 0
+            if not self.block:
+                return None
+        return self.block[self.block_pos]
+
+    def pop(self):
+        self.block_pos += 1
+        self.head += 1
+
+    def sync(self) -> int:
+        """ Write pending IDs to disk and return the file's length in bytes. """
+        self.flush()
+        _sync(self.fp)
+        return 4 * self.tail
+
+    def close(self):
+        self.flush()
+        self.fp.close()
+
+
+def resumable_crawl(state_dir="HW2/crawl_state", start=START,
+                    restricted_domain=RESTRICTED_DOMAIN, min_crawls=MIN_CRAWLS,
+                    output="HW2/network.csv", checkpoint_every=CHECKPOINT_EVERY,
+                    report_path=None, cache_dir=None):
+    report = Report("resumable_crawl")
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    os.makedirs(state_dir, exist_ok=True)
+    paths = {name: os.path.join(state_dir, name) for name in
+             ("urls.txt", "edges.bin", "frontier.bin", "checkpoint.json")}
+
+    # Load the last checkpoint, discarding anything written after it
+    checkpoint = None
+    if os.path.exists(paths["checkpoint.json"]):
+        with open(paths["checkpoint.json"]) as fp:
+            checkpoint = json.load(fp)
+        if (checkpoint["start"], checkpoint["restricted_domain"]) != (start, restricted_domain):
+            raise ValueError(f"{state_dir} holds a crawl of {checkpoint['start']}")
+
+    # Bitmaps of other checkpoints are stale (or from one that never committed)
+    visited_name = checkpoint.get("visited", "visited.bin") if checkpoint is not None else None
+    for name in os.listdir(state_dir):
+        if name.startswith("visited.") and name.endswith(".bin") and name != visited_name:
+            os.remove(os.path.join(state_dir, name))
+
+    links_to_ints = UrlStore(first_id=1)
+    if checkpoint is None:
+        for name in ("urls.txt", "edges.bin", "frontier.bin"):
+            _truncate(paths[name], 0)
+        pages = 0                   # pages crawled, including the start page
+        crawled = VisitedSet()
+        frontier_head = 0
+        generation = 0
+    else:
+        for name in ("urls.txt", "edges.bin", "frontier.bin"):
+            _truncate(paths[name], checkpoint[name])
+        pages = checkpoint["pages"]
+        with open(os.path.join(state_dir, visited_name), "rb") as fp:
+            crawled = VisitedSet.frombytes(fp.read())
+        generation = checkpoint.get("generation", 0)
+        frontier_head = checkpoint["frontier_head"]
+        with open(paths["urls.txt"], encoding="utf-8") as fp:
+            for line in fp:
+                links_to_ints.add(line.rstrip("\n"))
+        print(f"Resuming: {pages} pages crawled, {len(links_to_ints)} links seen")
+
+    urls = open(paths["urls.txt"], "a", encoding="utf-8")
+    history = EdgeLog(paths["edges.bin"])
+    links = FileQueue(paths["frontier.bin"], frontier_head)
+
+    def link_id(link: str) -> int:
+        url_id, is_new = links_to_ints.add(link)
+        if is_new:
+            urls.write(link + "\n")
+        return url_id
+
+    def save_checkpoint(done=False):
+        nonlocal generation
+        checkpoint_start = time.perf_counter()
+        generation += 1
+        visited = f"visited.{generation}.bin"
+        urls.flush()
+        _sync(urls)
+        state = {
+            "start": start,
+            "restricted_domain": restricted_domain,
+            "min_crawls": min_crawls,
+            "pages": pages,
+            "frontier_head": links.head,
+            "urls.txt": urls.tell(),
+            "edges.bin": history.sync(),
+            "frontier.bin": links.sync(),
+            "generation": generation,
+            "visited": visited,
+            "done": done,
+        }
+        with open(os.path.join(state_dir, visited), "wb") as fp:
+            fp.write(crawled.tobytes())
+            _sync(fp)
+        with open(paths["checkpoint.json"] + ".tmp", "w") as fp:
+            json.dump(state, fp)
+            _sync(fp)
+        os.replace(paths["checkpoint.json"] + ".tmp", paths["checkpoint.json"])
+        previous = os.path.join(state_dir, f"visited.{generation - 1}.bin")
+        if os.path.exists(previous):
+            os.remove(previous)
+        report.observe("checkpoint_seconds", time.perf_counter() - checkpoint_start)
+
+    if checkpoint is None:
+        links.append(link_id(start))
+
+    with report.stage("fetch"):
+        try:
+            while True:
+                curr_ID = links.peek() # BFS: Get first link in queue
+                if curr_ID is None:
+                    break
+                if curr_ID in crawled: # Ensure that we don't repeat a crawl
+                    links.pop()
+                    continue
+
+                try:
+                    next_links = fetch_links_timed(links_to_ints.url(curr_ID), report, len(links), cache)
+                except KeyboardInterrupt:
+                    # the current page has not been recorded yet, so the state is
+                    # consistent and it will be fetched again on resume
+                    save_checkpoint()
+                    print(f"Interrupted, checkpoint saved to {state_dir}")
+                    raise
+
+                # the start page and the next min_crawls pages add their links to
+                # the queue; the rest of the queue is then drained
+                add_to_queue = pages <= min_crawls
+                links.pop()
+                crawled.add(curr_ID)
+                pages += 1
+                for link in next_links or []:
+                    if restricted_domain in link: # check if in caltech domain
+                        next_ID = link_id(link)
+                        if add_to_queue:
+                            links.append(next_ID)
+                        history.append(curr_ID, next_ID)
+
+                if pages % checkpoint_every == 0:
+                    save_checkpoint()
+                    print(f"Checkpoint: {pages} pages crawled, {len(links)} queued")
+
+            save_checkpoint(done=True)
+        finally:
+            urls.close()
+            history.close()
+            links.close()
+
+    # Clean dataset to only include sites we crawled, streaming the edge log
+    print("Cleaning data")
+    with report.stage("clean"):
+        write_network(((s, e) for s, e in read_edge_log(paths["edges.bin"])
+                       if s in crawled and e in crawled), output)
+
+    seconds = report.stage_seconds("fetch")
+    report.set("pages_per_second", report.counters.get("pages_fetched", 0) / seconds
+               if seconds else 0.0)
+    report.set("pages", pages)
+    if report_path:
+        report.write(report_path)
+        print(report.summary())
+
+
+if __name__ == "__main__":
+    resumable_crawl(*sys.argv[1:2])
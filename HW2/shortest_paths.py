@@ -0,0 +1,210 @@
+"""
+Shortest-path metrics (diameter and average shortest path length) of an
+unweighted, undirected graph, replacing nx.diameter and
+nx.average_shortest_path_length, which each run a pure-Python BFS from every
+vertex.
+
+BFS runs level-synchronously from a batch of sources at once: the frontier of
+every source in the batch is one row of a sparse matrix, and the next level is
+the frontier times the CSR adjacency with already-visited vertices masked out.
+One pass over all sources gives every eccentricity and distance sum, so the
+diameter and the average path length come from the same BFS, and batches of
+sources are split across a process pool.
+
+For graphs too large for all-pairs BFS, exact_diameter bounds the diameter
+with a double sweep and iFUB (Crescenzi et al., 2013), and
+sampled_avg_path_length estimates the average from a sample of sources with a
+confidence interval.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import os
+import numpy as np
+import scipy.sparse as sp
+
+from clustering import binary_adjacency
+
+VISITED_BYTES = 1 << 26     # memory for the visited mask of one batch
+
+
+def bfs_from_sources(A, sources) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    BFS from each of sources over the binary CSR adjacency A. Returns, per
+    source, its eccentricity within its component, the sum of distances to the
+    vertices it reaches, and the number of vertices it reaches (itself
+    included).
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    b, n = len(sources), A.shape[0]
+    rows = np.arange(b)
+    visited = np.zeros((b, n), dtype=bool)
+    visited[rows, sources] = True
+    frontier = sp.csr_matrix((np.ones(b, dtype=np.int8), (rows, sources)), shape=(b, n))
+
+    eccentricity = np.zeros(b, dtype=np.int64)
+    distance_sum = np.zeros(b, dtype=np.int64)
+    reached = np.ones(b, dtype=np.int64)
+    level = 0
+    while frontier.nnz:
+        level += 1
+        step = (frontier @ A).tocoo()
+        new = ~visited[step.row, step.col]
+        rows, cols = step.row[new], step.col[new]
+        visited[rows, cols] = True
+        counts = np.bincount(rows, minlength=b)
+        distance_sum += level * counts
+        reached += counts
+        eccentricity[counts > 0] = level
+        frontier = sp.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                                 shape=(b, n))
+    return eccentricity, distance_sum, reached
+
+
+def _batch_size(n):
+    return int(max(1, min(256, VISITED_BYTES // max(n, 1))))
+
+
+_worker_adjacency = None
+
+def _init_worker(A):
+    global _worker_adjacency
+    _worker_adjacency = A
+
+def _bfs_batch(sources):
+    return bfs_from_sources(_worker_adjacency, sources)
+
+
+# Run bfs_from_sources over all of sources in batches, in a process pool if
+# workers > 1, and concatenate the results.
+def _bfs_all(A, sources, workers=None):
+    batch = _batch_size(A.shape[0])
+    batches = [sources[i:i + batch] for i in range(0, len(sources), batch)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(batches))
+    if workers <= 1:
+        results = [bfs_from_sources(A, s) for s in batches]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(A,)) as pool:
+            results = list(pool.map(_bfs_batch, batches))
+    if not results:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+def _adjacency(adj):
+    return binary_adjacency(adj, drop_loops=True)
+
+
+def _check_connected(reached, n):
+    if len(reached) and reached.min() < n:
+        raise ValueError("Found infinite path length because the graph is not connected")
+
+
+def path_metrics(adj, workers=None) -> Dict[str, float]:
+    """
+    Exact diameter and average shortest path length from one BFS per vertex.
+    Raises ValueError if the graph is not connected, as networkx does.
+    """
+    A = _adjacency(adj)
+    n = A.shape[0]
+    eccentricity, distance_sum, reached = _bfs_all(A, np.arange(n), workers)
+    _check_connected(reached, n)
+    return {
+        "diameter": int(eccentricity.max()) if n else 0,
+        "avg_path_length": float(distance_sum.sum() / (n * (n - 1))) if n > 1 else 0.0,
+    }
+
+
+def exact_diameter(adj, workers=None) -> int:
+    """
+    Exact diameter by iFUB: BFS from a central vertex u, then compute
+    eccentricities of the vertices farthest from u one distance level at a
+    time, stopping once the largest eccentricity found reaches twice the
+    next level. A double sweep from u gives the initial lower bound. On
+    real-world graphs this usually needs only a few BFSs.
+    """
+    A = _adjacency(adj)
+    n = A.shape[0]
+    if n == 0:
+        return 0
+    degrees = np.diff(A.indptr)
+    u = int(np.argmax(degrees))
+
+    # Double sweep: the eccentricity of the farthest vertex from u is a lower
+    # bound on the diameter.
+    distances = bfs_distances(A, u)
+    if (distances < 0).any():
+        raise ValueError("Found infinite path length because the graph is not connected")
+    far = int(np.argmax(distances))
+    lower = max(int(distances.max()), int(bfs_from_sources(A, [far])[0][0]))
+
+    # Vertices at distance <= level from u are at most 2 * level apart, so
+    # once the eccentricities of every vertex beyond level are known the
+    # diameter is at most max(lower, 2 * level).
+    level = int(distances.max())
+    while level > 0 and lower < 2 * level:
+        fringe = np.flatnonzero(distances == level)
+        eccentricity, _, _ = _bfs_all(A, fringe, workers)
+        lower = max(lower, int(eccentricity.max()))
+        level -= 1
+    return lower
+
+
+def neighbors_of(A, vertices) -> np.ndarray:
+    """ Concatenated CSR neighbor lists of vertices. """
+    starts, stops = A.indptr[vertices], A.indptr[np.asarray(vertices) + 1]
+    lengths = stops - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return A.indices[offsets + np.arange(lengths.sum())]
+
+
+def bfs_distances(A, source) -> np.ndarray:
+    """ Distances from source to every vertex, -1 where unreachable. """
+    n = A.shape[0]
+    distances = np.full(n, -1, dtype=np.int64)
+    distances[source] = 0
+    frontier = np.array([source])
+    level = 0
+    while len(frontier):
+        level += 1
+        neighbors = np.unique(neighbors_of(A, frontier))
+        neighbors = neighbors[distances[neighbors] < 0]
+        distances[neighbors] = level
+        frontier = neighbors
+    return distances
+
+
+def sampled_avg_path_length(adj, samples=256, seed: Optional[int] = None,
+                            workers=None, z=1.96) -> Dict[str, float]:
+    """
+    Estimate the average shortest path length from BFSs of a uniform sample
+    of sources. Each source's mean distance to the other vertices is one
+    observation of a sample drawn without replacement from the n per-source
+    means, whose average is the exact value, so the estimate comes with a
+    normal-approximation confidence interval of +/- half_width (z = 1.96 for
+    95%). The maximum eccentricity seen is a lower bound on the diameter.
+    """
+    A = _adjacency(adj)
+    n = A.shape[0]
+    if n < 2:
+        return {"avg_path_length": 0.0, "half_width": 0.0, "samples": n,
+                "diameter_lower_bound": 0}
+    k = min(samples, n)
+    rng = np.random.default_rng(seed)
+    sources = np.sort(rng.choice(n, size=k, replace=False))
+    eccentricity, distance_sum, reached = _bfs_all(A, sources, workers)
+    _check_connected(reached, n)
+
+    means = distance_sum / (n - 1)
+    estimate = float(means.mean())
+    if k == n or k == 1:
+        half_width = 0.0 if k == n else float("inf")
+    else:
+        # standard error with the finite population correction
+        se = means.std(ddof=1) / np.sqrt(k) * np.sqrt((n - k) / (n - 1))
+        half_width = float(z * se)
+    return {"avg_path_length": estimate, "half_width": half_width, "samples": k,
+            "diameter_lower_bound": int(eccentricity.max())}
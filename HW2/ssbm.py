@@ -1,30 +1,27 @@
 import networkx as nx
-import random
 import matplotlib.pyplot as plt
 import numpy as np
 
+from generators import sbm_edges
+
 n = 30
 k = 3
 A = 0.7
 B = 0.1
 
 seed = 3
-random.seed(seed)
 np.random.seed(seed)
 
 G = nx.Graph()
-for i in range(n):
-    G.add_node(i)
+G.add_nodes_from(range(n))
 communities = np.random.randint(0, k, n)
 
-for i in range(n): 
-    for j in range(i + 1, n): 
-        if communities[i] == communities[j]: 
-            prob = random.choices([0, 1], weights=[1 - A, A])[0]
-        else: 
-            prob = random.choices([0, 1], weights=[1 - B, B])[0]
-        if prob: 
-            G.add_edge(i, j)
+# sbm_edges numbers nodes block by block; map them back onto the randomly
+# assigned communities
+order = np.argsort(communities, kind='stable')
+probs = np.where(np.eye(k, dtype=bool), A, B)
+u, v, _ = sbm_edges(np.bincount(communities, minlength=k), probs, seed)
+G.add_edges_from(zip(order[u].tolist(), order[v].tolist()))
 
 # Figure 1: Original Drawing
 plt.figure(figsize=(12, 6))
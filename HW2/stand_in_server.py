@@ -0,0 +1,141 @@
+"""
+A local HTTP stand-in for caltech.edu, used to benchmark the crawlers without
+hitting the real site. The server serves a synthetic link graph: page /p/<i>
+is an HTML page linking to a fixed, seeded set of other pages, and every
+response can be delayed to emulate a real server round-trip. Pages carry an
+ETag and a Last-Modified date and conditional requests for unchanged pages
+get 304 Not Modified, as a real server would answer a recrawl.
+
+Run "python HW2/stand_in_server.py" to serve a graph on port 8144, or import
+it and call start_server() to run one in a background thread.
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+import hashlib
+import random
+import threading
+import time
+
+
+# Build a seeded random link graph: each page links to out_degree other pages,
+# with a bias towards low page numbers so that the graph has a few hubs.
+def make_link_graph(num_pages=2000, out_degree=10, seed=144) -> List[List[int]]:
+    rng = random.Random(seed)
+    graph = []
+    for page in range(num_pages):
+        targets = set()
+        while len(targets) < min(out_degree, num_pages - 1):
+            target = int(num_pages * rng.random() ** 2)
+            if target != page:
+                targets.add(target)
+        graph.append(sorted(targets))
+    return graph
+
+
+def render_page(page, targets) -> bytes:
+    links = "\n".join(f'<li><a href="/p/{t}">Page {t}</a></li>' for t in targets)
+    return (f"<html><head><title>Page {page}</title></head><body>\n"
+            f"<h1>Page {page}</h1>\n<ul>\n{links}\n</ul>\n"
+            f"</body></html>\n").encode("utf-8")
+
+
+def etag(body) -> str:
+    return '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+
+
+class LinkGraphHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep connections alive between requests
+
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    def not_modified(self, tag) -> bool:
+        match = self.headers.get("If-None-Match")
+        if match is not None:
+            return match.strip() == "*" or tag in (t.strip() for t in match.split(","))
+        since = self.headers.get("If-Modified-Since")
+        if since is None:
+            return False
+        try:
+            return parsedate_to_datetime(since).timestamp() >= int(self.server.modified)
+        except (TypeError, ValueError):
+            return False
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        body = None
+        path = self.path.split("?")[0]
+        if path == "/":
+            body = render_page("index", [0])
+        elif path.startswith("/p/"):
+            try:
+                page = int(path[3:].strip("/"))
+                body = render_page(page, server.graph[page])
+            except (ValueError, IndexError):
+                pass
+
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        tag = etag(body)
+        if self.not_modified(tag):
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", tag)
+        self.send_header("Last-Modified", formatdate(self.server.modified, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LinkGraphServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, graph, latency=0.0):
+        super().__init__(address, LinkGraphHandler)
+        self.graph = graph
+        self.latency = latency
+        self.hits = 0
+        self.bytes_sent = 0             # body bytes of 200 responses
+        self.modified = time.time()     # Last-Modified of every page
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+# Start a stand-in server on a background thread. Call server.shutdown() to
+# stop it.
+def start_server(graph=None, latency=0.0, host="127.0.0.1", port=0) -> LinkGraphServer:
+    if graph is None:
+        graph = make_link_graph()
+    server = LinkGraphServer((host, port), graph, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    server = LinkGraphServer(("127.0.0.1", 8144), make_link_graph(), latency=0.02)
+    print(f"Serving synthetic link graph on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,180 @@
+"""
+Compact data structures for crawl state. A crawl of millions of pages keeps
+every URL it has seen, which pages it has visited, and every edge it has
+found; storing these as a dict of strings, a list of IDs and a set of tuples
+costs a few hundred bytes per entry and makes visited checks O(n). These
+classes keep the same information in flat arrays instead:
+
+    UrlStore    - URL -> dense integer ID, with the URLs packed in one buffer
+    VisitedSet  - bitmap of visited IDs
+    EdgeBuffer  - (source, target) ID pairs in two parallel arrays
+"""
+
+from array import array
+from typing import Iterator, Optional, Tuple
+
+
+class UrlStore:
+    """
+    Interns URLs as dense integer IDs starting at first_id. The UTF-8 bytes of
+    all URLs are packed back to back in a single bytearray, so looking up the
+    URL of an ID is a slice, and the URL -> ID direction is an open-addressing
+    hash table of IDs rather than a dict of Python strings.
+    """
+    def __init__(self, first_id=1, capacity=1024):
+        self.first_id = first_id
+        self._data = bytearray()            # all URLs, concatenated
+        self._offsets = array('Q', [0])     # URL k is _data[_offsets[k]:_offsets[k + 1]]
+        self._hashes = array('q')           # hash of URL k, kept for resizing
+        size = 8
+        while size < 2 * capacity:
+            size *= 2
+        self._table = array('i', [-1]) * size   # slot -> URL index, -1 if empty
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, url: str):
+        return self.get(url) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for k in range(len(self)):
+            yield self._url(k)
+
+    def _url(self, k: int) -> str:
+        return self._data[self._offsets[k]:self._offsets[k + 1]].decode('utf-8')
+
+    # Find the table slot of an encoded URL: either the slot holding it or the
+    # empty slot where it would be inserted.
+    def _slot(self, encoded: bytes, h: int) -> int:
+        mask = len(self._table) - 1
+        slot = h & mask
+        while True:
+            k = self._table[slot]
+            if k == -1:
+                return slot
+            if self._hashes[k] == h and \
+                    self._data[self._offsets[k]:self._offsets[k + 1]] == encoded:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        table = array('i', [-1]) * (2 * len(self._table))
+        mask = len(table) - 1
+        for k, h in enumerate(self._hashes):
+            slot = h & mask
+            while table[slot] != -1:
+                slot = (slot + 1) & mask
+            table[slot] = k
+        self._table = table
+
+    def get(self, url: str) -> Optional[int]:
+        """ Return the ID of url, or None if it has not been added. """
+        encoded = url.encode('utf-8')
+        k = self._table[self._slot(encoded, hash(encoded))]
+        return None if k == -1 else k + self.first_id
+
+    def add(self, url: str) -> Tuple[int, bool]:
+        """
+        Return the ID of url, adding it if needed, and whether it was new.
+        """
+        encoded = url.encode('utf-8')
+        h = hash(encoded)
+        slot = self._slot(encoded, h)
+        k = self._table[slot]
+        if k != -1:
+            return k + self.first_id, False
+
+        k = len(self._hashes)
+        self._data.extend(encoded)
+        self._offsets.append(len(self._data))
+        self._hashes.append(h)
+        self._table[slot] = k
+        if 2 * len(self._hashes) > len(self._table):   # keep load factor <= 1/2
+            self._grow()
+        return k + self.first_id, True
+
+    def url(self, url_id: int) -> str:
+        """ Return the URL with the given ID. """
+        k = url_id - self.first_id
+        if not 0 <= k < len(self):
+            raise KeyError(url_id)
+        return self._url(k)
+
+    def nbytes(self) -> int:
+        return (len(self._data) + self._offsets.itemsize * len(self._offsets)
+                + self._hashes.itemsize * len(self._hashes)
+                + self._table.itemsize * len(self._table))
+
+
+class VisitedSet:
+    """ A set of non-negative integer IDs stored as a growable bitmap. """
+    def __init__(self, capacity=1024):
+        self._bits = bytearray((capacity + 7) // 8)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, i: int):
+        byte = i >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (i & 7)))
+
+    def add(self, i: int):
+        byte = i >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(max(byte + 1, 2 * len(self._bits)) - len(self._bits)))
+        mask = 1 << (i & 7)
+        if not self._bits[byte] & mask:
+            self._bits[byte] |= mask
+            self._count += 1
+
+    def tobytes(self) -> bytes:
+        return bytes(self._bits)
+
+    @classmethod
+    def frombytes(cls, data: bytes) -> 'VisitedSet':
+        visited = cls(0)
+        visited._bits = bytearray(data)
+        visited._count = sum(bin(b).count('1') for b in data)
+        return visited
+
+    def __iter__(self) -> Iterator[int]:
+        for byte, bits in enumerate(self._bits):
+            if bits:
+                for bit in range(8):
+                    if bits & (1 << bit):
+                        yield 8 * byte + bit
+
+
+class EdgeBuffer:
+    """
+    A list of (source, target) ID pairs stored in two parallel unsigned 32-bit
+    arrays. Unlike a set of tuples it does not deduplicate; the crawlers only
+    record each page's (already deduplicated) links once, so no duplicates
+    arise.
+    """
+    def __init__(self):
+        self.sources = array('I')
+        self.targets = array('I')
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.sources, self.targets)
+
+    def append(self, source: int, target: int):
+        self.sources.append(source)
+        self.targets.append(target)
+
+    def restrict(self, nodes) -> 'EdgeBuffer':
+        """ Return the edges whose endpoints are both in nodes. """
+        kept = EdgeBuffer()
+        for source, target in self:
+            if source in nodes and target in nodes:
+                kept.append(source, target)
+        return kept
+
+    def nbytes(self) -> int:
+        return self.sources.itemsize * (len(self.sources) + len(self.targets))
@@ -1,41 +1,40 @@
-import networkx as nx
+import os
+
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-
-df = pd.read_csv("HW2/network.csv")
-
-df100 = df[(df["source"] <= 100) & (df["target"] <= 100)]
-df300 = df[(df["source"] <= 300) & (df["target"] <= 300)]
-
-G100: nx.Graph = nx.from_pandas_edgelist(df100, 'source', 'target', create_using=nx.DiGraph)
-G300: nx.Graph = nx.from_pandas_edgelist(df300, 'source', 'target', create_using=nx.DiGraph)
-
-node_degrees = dict(G100.degree())
-node_colors = [node_degrees[node] for node in G100.nodes()]
-cmap = plt.colormaps.get_cmap("cool")
-norm = plt.Normalize(min(node_colors), max(node_colors))
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-sm.set_array([])
-
-plt.figure(figsize=(18, 8))
-nx.draw(G100, pos=nx.circular_layout(G100), with_labels=True, width=0.3, node_color=node_colors, cmap=cmap)
-plt.savefig("HW2/imgs/web100_circle.png")
-
-plt.clf()
-nx.draw(G100, pos=nx.kamada_kawai_layout(G100), width=0.3, node_color=node_colors, cmap=cmap)
-plt.savefig("HW2/imgs/web100_kk.png")
-
-node_degrees = dict(G300.degree())
-node_colors = [node_degrees[node] for node in G300.nodes()]
-cmap = plt.colormaps.get_cmap("cool")
-norm = plt.Normalize(min(node_colors), max(node_colors))
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-sm.set_array([])
-plt.clf()
-nx.draw(G300, pos=nx.kamada_kawai_layout(G300), width=0.3, node_color=node_colors, cmap=cmap)
-plt.savefig("HW2/imgs/web300_kk.png")
-
-plt.clf()
-nx.draw(G300, pos=nx.layout.spring_layout(G300, k=2), width=0.3, node_color=node_colors, cmap=cmap)
-plt.savefig("HW2/imgs/web300_spring.png")
\ No newline at end of file
+
+from graph_analysis import load_edge_list
+from layout import cached_layout, circular_layout, draw
+
+# Subgraphs on the edges between the first limit sites
+def first_sites(g, limit):
+    sub = g.subgraph(g.labels <= limit)
+    return sub.subgraph(np.diff(sub.indptr) > 0) # drop sites with no such edges
+
+# Draw a graph colored by degree; layouts are cached, so only the first run
+# pays for them
+def draw_by_degree(graph, pos, path, **kwargs):
+    A = graph.adjacency()
+    draw(A, pos, path, node_color=np.diff(A.indptr), cmap="cool", **kwargs)
+    plt.close()
+
+def visualize(edge_list="HW2/network.csv", imgs_dir="HW2/imgs"):
+    # Loaded from the memory-mapped graph cache after the first run
+    g = load_edge_list(edge_list)
+    G100 = first_sites(g, 100)
+    G300 = first_sites(g, 300)
+
+    draw_by_degree(G100, circular_layout(G100.num_nodes),
+                   os.path.join(imgs_dir, "web100_circle.png"), labels=G100.labels)
+    draw_by_degree(G100, cached_layout(G100.adjacency(), edge_list, seed=0),
+                   os.path.join(imgs_dir, "web100_force.png"))
+    draw_by_degree(G300, cached_layout(G300.adjacency(), edge_list, seed=0),
+                   os.path.join(imgs_dir, "web300_force.png"))
+
+    # The whole crawl, which the old dense layouts could not handle
+    draw_by_degree(g, cached_layout(g.adjacency(), edge_list, seed=0),
+                   os.path.join(imgs_dir, "web_all_force.png"))
+
+
+if __name__ == "__main__":
+    visualize()